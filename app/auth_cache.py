@@ -0,0 +1,44 @@
+# app/auth_cache.py
+import hashlib
+import threading
+import time
+
+from cachetools import TTLCache
+
+class AuthCache:
+    """Thread-safe TTL cache for verified access tokens"""
+
+    def __init__(self, maxsize=10000, ttl=30):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        # Only the hash of the token is kept in memory, never the raw token
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        """Return the cached user data for a token, or None on a miss"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+
+            expires_at, user_data = entry
+            if time.time() >= expires_at:
+                # The token itself expired before the cache TTL did
+                self._cache.pop(key, None)
+                return None
+
+        return user_data
+
+    def set(self, token, user_data, token_exp=None):
+        """Cache user data for a token, never past the token's own expiry"""
+        expires_at = time.time() + self.ttl
+        if token_exp:
+            expires_at = min(expires_at, token_exp)
+
+        with self._lock:
+            self._cache[self._key(token)] = (expires_at, user_data)
@@ -2,6 +2,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from typing import Optional, List
+from functools import lru_cache
 import os
 
 class Settings(BaseSettings):
@@ -12,16 +13,12 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Health Tracker API"
     
     # CORS
-    BACKEND_CORS_ORIGINS: List[str] = Field(default=["*"])
+    BACKEND_CORS_ORIGINS: List[str] = Field(default=[])  # Explicit origins only; localhost is added in development
     
     # Firebase
     FIREBASE_CREDENTIALS_PATH: str = "service-account.json"
     FIREBASE_API_KEY: str = Field(..., env="FIREBASE_API_KEY")
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        print(f"FIREBASE_CREDENTIALS_PATH: {self.FIREBASE_CREDENTIALS_PATH}")
-
     # JWT Settings
     SECRET_KEY: str = "development_secret_key"
     ALGORITHM: str = "HS256"
@@ -31,9 +28,38 @@ class Settings(BaseSettings):
     ENABLE_NOTIFICATIONS: bool = True
     FCM_API_KEY: Optional[str] = None
 
+    # Auth cache
+    AUTH_CACHE_MAX: int = 10000
+    AUTH_CACHE_TTL: int = 30  # seconds
+
+    # User profile cache; shared across workers through Redis when REDIS_URL is set
+    REDIS_URL: Optional[str] = None
+    USER_CACHE_MAX: int = 10000
+    USER_CACHE_TTL: int = 300  # seconds
+    HOME_CACHE_TTL: int = 60  # seconds
+
+    # Firestore read cache
+    READ_CACHE_MAX: int = 10000
+    READ_CACHE_TTL: int = 30  # seconds
+
+    # Without Redis each worker caches on its own and never sees the others' writes, so keep that short
+    LOCAL_CACHE_TTL: int = 3  # seconds
+
+    # Measurement image uploads
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    OCR_WORKERS: int = 2
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+
     ENVIRONMENT: str = "development"
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = True
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings, parsed from the environment once"""
+    return Settings()
@@ -1,18 +1,85 @@
 # app/dependencies.py
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header, Request
 from typing import Optional
+from datetime import datetime, timezone
+import asyncio
 import logging
-from firebase_client import FirebaseClient
+from firebase_client import FirebaseClient, get_firebase_client
+from services.auth_service import AuthService
+from services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
-firebase_client = FirebaseClient()
 
-async def get_current_user(authorization: Optional[str] = Header(None)):
+def get_firebase(request: Request) -> FirebaseClient:
+    """
+    Get the Firebase client the app lifespan stored on app.state
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        FirebaseClient: The worker's shared client
+    """
+    # Fall back to the process singleton when the app runs without its lifespan, e.g. in a bare TestClient
+    return getattr(request.app.state, 'firebase', None) or get_firebase_client()
+
+def get_auth_service(request: Request) -> AuthService:
+    """
+    Get the auth service the app lifespan stored on app.state
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        AuthService: The worker's shared service, with its token cache
+    """
+    service = getattr(request.app.state, 'auth', None)
+    if service is None:
+        # Built on first use when the app runs without its lifespan
+        service = request.app.state.auth = AuthService(get_firebase(request))
+    return service
+
+def get_notifications(request: Request) -> NotificationService:
+    """
+    Get the notification service the app lifespan stored on app.state
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        NotificationService: The worker's shared service
+    """
+    service = getattr(request.app.state, 'notifications', None)
+    if service is None:
+        # Built on first use when the app runs without its lifespan
+        service = request.app.state.notifications = NotificationService(get_firebase(request))
+    return service
+
+def request_now(request: Request) -> datetime:
+    """
+    Get the current UTC time, read once per request and shared by every dependency and handler
+
+    Args:
+        request: The incoming request
+
+    Returns:
+        datetime: Timezone-aware UTC timestamp for this request
+    """
+    now = getattr(request.state, 'now', None)
+    if now is None:
+        now = request.state.now = datetime.now(timezone.utc)
+    return now
+
+async def get_current_user(
+    authorization: Optional[str] = Header(None),
+    fb: FirebaseClient = Depends(get_firebase)
+):
     """
     Get the current user from the Firebase ID token in the Authorization header.
     
     Args:
         authorization: The Authorization header value (Bearer token)
+        fb: The Firebase client
         
     Returns:
         dict: User data
@@ -21,21 +88,25 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         HTTPException: If the token is missing or invalid
     """
 
-    logger.info(f"Authorization header: {authorization}")
-
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication credentials missing",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    # Extract token from "Bearer {token}"
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authorization header format. Use 'Bearer {token}'",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = authorization[7:]
+
     try:
-        # Extract token from "Bearer {token}"
-        token = authorization.split(" ")[1] if " " in authorization else authorization
-        
         # Verify the token
-        user = firebase_client.verify_id_token(token)
+        user = await asyncio.to_thread(fb.verify_id_token, token)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,15 +115,8 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
             )
         
         return user
-    except IndexError:
-        # Malformed Authorization header
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format. Use 'Bearer {token}'",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
     except Exception as e:
-        logger.error(f"Authentication error: {str(e)}")
+        logger.error("Authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
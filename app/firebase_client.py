@@ -1,66 +1,204 @@
 # app/firebase_client.py
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore, firestore_async, auth
+from google.api_core.exceptions import NotFound
+import asyncio
+import httpx
 import os
 import json
+import base64
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
+import threading
+from functools import lru_cache
+
+from read_cache import ReadCache
+from user_cache import UserCache
+from config import get_settings
+from models.measurement import MEASUREMENT_TYPES
 
 # Load environment variables from .env file
 load_dotenv()
 
+FCM_SEND_URL = "https://fcm.googleapis.com/v1/projects/{project_id}/messages:send"
+
+@lru_cache(maxsize=8192)
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp, memoized since the same stored strings are parsed on every read
+
+    Args:
+        value (str): ISO 8601 timestamp; a trailing 'Z' is accepted on Python 3.11+
+
+    Returns:
+        datetime: The parsed timestamp
+
+    Raises:
+        ValueError: If the string is not a valid ISO 8601 timestamp
+    """
+    return datetime.fromisoformat(value)
+
+class InvalidCursor(ValueError):
+    """Raised when a page cursor passed back by a client can't be decoded"""
+
+def _encode_cursor(created_at, doc_id):
+    """Pack a page boundary into an opaque, URL-safe cursor"""
+    raw = json.dumps([created_at.isoformat(), doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """
+    Unpack a cursor made by _encode_cursor
+
+    Returns:
+        tuple: (created_at, document id)
+
+    Raises:
+        InvalidCursor: If the cursor is not one we issued
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, doc_id = json.loads(raw)
+        if not isinstance(doc_id, str) or not doc_id or '/' in doc_id:
+            raise ValueError("bad document id")
+        return parse_timestamp(created_at), doc_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid page cursor: {cursor!r}") from e
+
+def _normalize_datetimes(data, fields):
+    """Coerce the given fields to datetime or None, so callers never need to type-check them"""
+    for field in fields:
+        if field not in data:
+            continue
+        value = data[field]
+        if isinstance(value, str):
+            try:
+                value = parse_timestamp(value)
+            except ValueError:
+                value = None
+        elif not isinstance(value, datetime):
+            value = None
+        data[field] = value
+    return data
+
+@firestore.transactional
+def _update_if_exists(transaction, doc_ref, update_data):
+    """Apply an update only if the document exists, returning the merged document or None"""
+    snapshot = doc_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return None
+    transaction.update(doc_ref, update_data)
+    return snapshot.to_dict() | update_data | {'id': snapshot.id}
+
 class FirebaseClient:
     """Firebase client for health tracker application"""
     
     _instance = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(FirebaseClient, cls).__new__(cls)
-
-            # Initialize Firebase only once
-            if not firebase_admin._apps:
-                try:
-                    # First, check for credentials JSON in environment (for deployment)
-                    cred_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
-                    cred_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
-
-                    if cred_json:
-                        logging.info("Initializing Firebase using JSON credentials from environment.")
-                        cred_dict = json.loads(cred_json)
-                        cred = credentials.Certificate(cred_dict)
-                    elif cred_path:
-                        logging.info(f"Initializing Firebase using local credentials file: {cred_path}")
-                        
-                        # Use absolute path if needed
-                        if not os.path.isabs(cred_path):
-                            cred_path = os.path.join(os.path.dirname(__file__), cred_path)
-                        
-                        if not os.path.exists(cred_path):
-                            raise ValueError(f"Invalid Firebase credentials path: {cred_path}")
-                        
-                        cred = credentials.Certificate(cred_path)
-                    else:
-                        raise ValueError("Firebase credentials not found. Set FIREBASE_CREDENTIALS_JSON or FIREBASE_CREDENTIALS_PATH.")
+            with cls._lock:
+                # Re-check under the lock so concurrent first calls initialize only once
+                if cls._instance is None:
+                    instance = super(FirebaseClient, cls).__new__(cls)
+
+                    try:
+                        # Initialize the Firebase app only once per process
+                        if not firebase_admin._apps:
+                            # First, check for credentials JSON in environment (for deployment)
+                            cred_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
+                            cred_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
+
+                            if cred_json:
+                                logging.info("Initializing Firebase using JSON credentials from environment.")
+                                cred_dict = json.loads(cred_json)
+                                cred = credentials.Certificate(cred_dict)
+                            elif cred_path:
+                                logging.info("Initializing Firebase using local credentials file: %s", cred_path)
+                                
+                                # Use absolute path if needed
+                                if not os.path.isabs(cred_path):
+                                    cred_path = os.path.join(os.path.dirname(__file__), cred_path)
+                                
+                                if not os.path.exists(cred_path):
+                                    raise ValueError(f"Invalid Firebase credentials path: {cred_path}")
+                                
+                                cred = credentials.Certificate(cred_path)
+                            else:
+                                raise ValueError("Firebase credentials not found. Set FIREBASE_CREDENTIALS_JSON or FIREBASE_CREDENTIALS_PATH.")
+                            
+                            firebase_admin.initialize_app(cred)
+
+                        instance.db = firestore.client()
+                        instance.async_db = firestore_async.client()
+
+                        # Dashboard screens hit several list endpoints at once, all reading the same documents
+                        settings = get_settings()
+                        instance.read_cache = ReadCache(
+                            redis_url=settings.REDIS_URL,
+                            maxsize=settings.READ_CACHE_MAX,
+                            ttl=settings.READ_CACHE_TTL if settings.REDIS_URL else min(settings.READ_CACHE_TTL, settings.LOCAL_CACHE_TTL)
+                        )
+                        # Profiles are read on every authenticated request and rarely change
+                        instance.user_cache = UserCache(
+                            redis_url=settings.REDIS_URL,
+                            maxsize=settings.USER_CACHE_MAX,
+                            ttl=settings.USER_CACHE_TTL if settings.REDIS_URL else min(settings.USER_CACHE_TTL, settings.LOCAL_CACHE_TTL)
+                        )
+                        # The home screen aggregates several reads; any write to the user's data drops it
+                        instance.home_cache = UserCache(
+                            redis_url=settings.REDIS_URL,
+                            maxsize=settings.USER_CACHE_MAX,
+                            ttl=settings.HOME_CACHE_TTL if settings.REDIS_URL else min(settings.HOME_CACHE_TTL, settings.LOCAL_CACHE_TTL),
+                            prefix="home"
+                        )
+
+                        # Shared HTTP/2 connection pool for FCM and any other outbound calls
+                        instance.http = httpx.AsyncClient(
+                            http2=True,
+                            timeout=5.0,
+                            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+                        )
+                        logging.info("Firebase initialized successfully.")
                     
-                    firebase_admin.initialize_app(cred)
-                    cls._instance.db = firestore.client()
-                    logging.info("Firebase initialized successfully.")
-                
-                except Exception as e:
-                    logging.error(f"Error initializing Firebase: {e}")
-                    raise e
+                    except Exception as e:
+                        logging.error("Error initializing Firebase: %s", e)
+                        raise e
+
+                    # Only publish the instance once it is fully initialized
+                    cls._instance = instance
 
         return cls._instance
     
     #Get user
     def get_user(self, user_id):
         """Get user data by ID"""
+        cached_user = self.user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+
         user_ref = self.db.collection('users').document(user_id)
         user = user_ref.get()
         if user.exists:
-            return user.to_dict()
+            user_data = user.to_dict()
+            self.user_cache.set(user_id, user_data)
+            return user_data
+        return None
+    
+    #Get user (async)
+    async def aget_user(self, user_id):
+        """Get user data by ID without blocking the event loop"""
+        cached_user = await self.user_cache.aget(user_id)
+        if cached_user is not None:
+            return cached_user
+
+        user = await self.async_db.collection('users').document(user_id).get()
+        if user.exists:
+            user_data = user.to_dict()
+            await self.user_cache.aset(user_id, user_data)
+            return user_data
         return None
     
     #Create user
@@ -97,26 +235,97 @@ class FirebaseClient:
     
     #Update user
     def update_user(self, user_id, user_data):
-        """Update user data"""
+        """
+        Update user data
+        
+        Returns:
+            dict: The updated profile, merged locally from the cached copy when there is one,
+            so the caller doesn't need to read it back
+        """
         try:
             user_ref = self.db.collection('users').document(user_id)
-            user_data['updated_at'] = firestore.SERVER_TIMESTAMP
+            # A concrete timestamp instead of SERVER_TIMESTAMP, so the merged profile can be returned as-is
+            user_data['updated_at'] = datetime.now(timezone.utc)
+            cached_user = self.user_cache.get(user_id)
             user_ref.update(user_data)
-            return True
+            self.home_cache.invalidate(user_id)
+
+            if cached_user is None:
+                self.user_cache.invalidate(user_id)
+                return self.get_user(user_id)
+            updated_user = {**cached_user, **user_data}
+            self.user_cache.set(user_id, updated_user)
+            return updated_user
         except Exception as e:
             raise e
     
+    # Drop cached reads after a write
+    def _invalidate(self, user_id, collection):
+        """Drop the user's cached queries on a collection along with their cached home screen"""
+        self.read_cache.invalidate(user_id, collection)
+        self.home_cache.invalidate(user_id)
+    
+    # Get a page of documents from a collection
+    def _get_page(self, collection_ref, limit, start_after):
+        """
+        Get documents ordered by creation time (newest first)
+
+        Args:
+            collection_ref: Firestore collection reference
+            limit (int): Page size, or None for all documents
+            start_after (str): Cursor returned by the previous page
+
+        Returns:
+            dict: {'items': [...], 'next': cursor for the next page or None}
+
+        Raises:
+            InvalidCursor: If start_after is malformed
+        """
+        # Document id breaks ties between documents created in the same batch
+        query = (collection_ref
+                 .order_by('created_at', direction=firestore.Query.DESCENDING)
+                 .order_by('__name__', direction=firestore.Query.DESCENDING))
+        if start_after:
+            created_at, doc_id = _decode_cursor(start_after)
+            query = query.start_after({'created_at': created_at, '__name__': collection_ref.document(doc_id)})
+        if limit:
+            query = query.limit(limit)
+
+        docs = query.get()
+        items = [doc.to_dict() for doc in docs]
+        next_cursor = None
+        if limit and len(items) == limit:
+            next_cursor = _encode_cursor(items[-1]['created_at'], docs[-1].id)
+        return {'items': items, 'next': next_cursor}
+    
     #Get medications
-    def get_medications(self, user_id):
-        """Get all medications for a user"""
+    def get_medications(self, user_id, limit=None, start_after=None):
+        """Get a user's medications, or one page of them when a limit is given"""
+        cache_key = (limit, start_after)
+        page = self.read_cache.get(user_id, 'medications', cache_key)
+        if page is not None:
+            return page
+
         medications_ref = self.db.collection('users').document(user_id).collection('medications')
-        medications = medications_ref.get()
-        return [doc.to_dict() for doc in medications]
+        page = self._get_page(medications_ref, limit, start_after)
+        for medication in page['items']:
+            _normalize_datetimes(medication, ('last_taken', 'next_dose'))
+        self.read_cache.set(user_id, 'medications', cache_key, page)
+        return page
+    
+    #Get medication by ID
+    def get_medication_by_id(self, user_id, medication_id):
+        """Get a single medication for a user, or None if it doesn't exist"""
+        doc = (self.db.collection('users').document(user_id)
+               .collection('medications').document(medication_id).get())
+        if doc.exists:
+            return _normalize_datetimes(doc.to_dict() | {'id': doc.id}, ('last_taken', 'next_dose'))
+        return None
     
     #Get upcoming medications
-    def get_upcoming_medications(self, user_id, limit=5):
+    def get_upcoming_medications(self, user_id, limit=5, now=None):
         """Get upcoming medications for a user"""
-        now = datetime.now()
+        now = now or datetime.now(timezone.utc)
         tomorrow = now + timedelta(days=1)
         
         medications_ref = (self.db.collection('users').document(user_id)
@@ -129,6 +338,38 @@ class FirebaseClient:
         medications = medications_ref.get()
         return [doc.to_dict() for doc in medications]
     
+    #Get active medications
+    def get_active_medications(self, user_id, limit=5, now=None, fields=None):
+        """
+        Get a user's newest medications that haven't ended, filtered and projected by Firestore
+        
+        Args:
+            user_id (str): The user ID
+            limit (int): Maximum number of medications to return
+            now (datetime, optional): Medications ending before this are left out
+            fields (list, optional): Only download these fields; created_at is always included for ordering
+        
+        Returns:
+            list: Medication data, newest first
+        """
+        now = now or datetime.now(timezone.utc)
+        medications_ref = self.db.collection('users').document(user_id).collection('medications')
+        
+        # Firestore has no "null or greater than" filter, so open-ended and still-running medications
+        # are two queries. Medications with an end date still ahead are few, so that query isn't limited
+        open_ended = (medications_ref.where('end_date', '==', None)
+                      .order_by('created_at', direction=firestore.Query.DESCENDING)
+                      .limit(limit))
+        ending_later = medications_ref.where('end_date', '>', now)
+        if fields:
+            fields = list(dict.fromkeys([*fields, 'created_at']))
+            open_ended = open_ended.select(fields)
+            ending_later = ending_later.select(fields)
+        
+        medications = [doc.to_dict() for doc in open_ended.get()] + [doc.to_dict() for doc in ending_later.get()]
+        medications.sort(key=lambda medication: medication['created_at'], reverse=True)
+        return [_normalize_datetimes(medication, ('last_taken', 'next_dose')) for medication in medications[:limit]]
+    
     #Add medication
     def add_medication(self, user_id, medication_data):
         """Add a new medication for a user"""
@@ -142,21 +383,53 @@ class FirebaseClient:
                 last_taken = medication_data['last_taken']
                 frequency_hours = medication_data['frequency']
                 if isinstance(last_taken, str):
-                    last_taken = datetime.fromisoformat(last_taken.replace('Z', '+00:00'))
+                    last_taken = parse_timestamp(last_taken)
                 next_dose = last_taken + timedelta(hours=frequency_hours)
                 medication_data['next_dose'] = next_dose
 
-            logging.info(f"Saving medication data: {medication_data}")
+            logging.info("Saving medication data: %s", medication_data)
 
             doc_ref = medications_ref.document()
             medication_data['id'] = doc_ref.id
             doc_ref.set(medication_data)
+            self._invalidate(user_id, 'medications')
 
-            logging.info(f"Medication document created with ID: {doc_ref.id}")
+            logging.info("Medication document created with ID: %s", doc_ref.id)
             return doc_ref.id
         except Exception as e:
             raise e
     
+    #Add medications in bulk
+    def add_medications(self, user_id, medications_data, now=None):
+        """
+        Add several medications for a user, committing up to 500 writes per batch
+        
+        Args:
+            user_id (str): The user ID
+            medications_data (list): Medication documents, with next_dose already calculated
+            now (datetime, optional): Creation time to store
+        
+        Returns:
+            list: The stored documents, with their new ids
+        """
+        medications_ref = self.db.collection('users').document(user_id).collection('medications')
+        # Concrete timestamps instead of SERVER_TIMESTAMP, so the written documents can be returned as-is
+        now = now or datetime.now(timezone.utc)
+        
+        # Firestore caps a batched write at 500 operations
+        for i in range(0, len(medications_data), 500):
+            batch = self.db.batch()
+            for medication_data in medications_data[i:i + 500]:
+                doc_ref = medications_ref.document()
+                medication_data['id'] = doc_ref.id
+                medication_data['created_at'] = now
+                medication_data['updated_at'] = now
+                batch.set(doc_ref, medication_data)
+            batch.commit()
+        
+        self._invalidate(user_id, 'medications')
+        return medications_data
+    
     #Update medication
     def update_medication(self, user_id, medication_id, medication_data):
         """Update a medication for a user"""
@@ -171,70 +444,271 @@ class FirebaseClient:
                 last_taken = medication_data['last_taken']
                 frequency_hours = medication_data['frequency']
                 if isinstance(last_taken, str):
-                    last_taken = datetime.fromisoformat(last_taken.replace('Z', '+00:00'))
+                    last_taken = parse_timestamp(last_taken)
                 next_dose = last_taken + timedelta(hours=frequency_hours)
                 medication_data['next_dose'] = next_dose
             
             medication_ref.update(medication_data)
+            self._invalidate(user_id, 'medications')
             return True
         except Exception as e:
             raise e
     
+    #Delete medication
+    def delete_medication(self, user_id, medication_id):
+        """
+        Delete a medication with a single conditional write, no read needed
+        
+        Returns:
+            bool: False if the medication doesn't exist
+        """
+        doc_ref = (self.db.collection('users').document(user_id)
+                   .collection('medications').document(medication_id))
+        if not self._delete_if_exists(doc_ref):
+            return False
+        self._invalidate(user_id, 'medications')
+        return True
+    
+    # Delete a document, failing instead of no-oping when it is missing
+    def _delete_if_exists(self, doc_ref):
+        try:
+            doc_ref.delete(option=self.db.write_option(exists=True))
+            return True
+        except NotFound:
+            return False
+    
     #Get appointments
-    def get_appointments(self, user_id):
-        """Get all appointments for a user"""
+    def get_appointments(self, user_id, limit=None, start_after=None):
+        """Get a user's appointments, or one page of them when a limit is given"""
         appointments_ref = self.db.collection('users').document(user_id).collection('appointments')
-        appointments = appointments_ref.get()
-        return [doc.to_dict() for doc in appointments]
+        return self._get_page(appointments_ref, limit, start_after)
     
     #Get upcoming appointments
-    def get_upcoming_appointments(self, user_id, limit=5):
+    def get_upcoming_appointments(self, user_id, limit=5, now=None):
         """Get upcoming appointments for a user"""
-        now = datetime.now()
+        now = now or datetime.now(timezone.utc)
         appointments_ref = (self.db.collection('users').document(user_id)
                            .collection('appointments')
-                           .where('date', '>=', now)
-                           .order_by('date')
+                           .where('appointment_date', '>=', now)
+                           .order_by('appointment_date')
                            .limit(limit))
         
         appointments = appointments_ref.get()
         return [doc.to_dict() for doc in appointments]
     
+    #Get dashboard
+    async def get_dashboard(self, user_id, now=None):
+        """
+        Get the data for the user's dashboard with all reads issued concurrently
+
+        Args:
+            user_id (str): The user ID
+            now (datetime): Reference time for the upcoming items, defaults to the current UTC time
+
+        Returns:
+            dict: User profile, upcoming medications and appointments, and latest measurement of each type
+        """
+        now = now or datetime.now(timezone.utc)
+        user_ref = self.async_db.collection('users').document(user_id)
+
+        async def get_user():
+            return [snap async for snap in self.async_db.get_all([user_ref])]
+
+        upcoming_medications = (user_ref.collection('medications')
+                                .where('next_dose', '>=', now)
+                                .where('next_dose', '<=', now + timedelta(days=1))
+                                .order_by('next_dose')
+                                .limit(3))
+        upcoming_appointments = (user_ref.collection('appointments')
+                                 .where('appointment_date', '>=', now)
+                                 .order_by('appointment_date')
+                                 .limit(1))
+        latest_measurements = [
+            user_ref.collection('measurements')
+            .where('type', '==', m_type)
+            .order_by('timestamp', direction=firestore.Query.DESCENDING)
+            .limit(1)
+            for m_type in MEASUREMENT_TYPES
+        ]
+
+        user_snapshots, medication_docs, appointment_docs, *measurement_docs = await asyncio.gather(
+            get_user(),
+            upcoming_medications.get(),
+            upcoming_appointments.get(),
+            *(query.get() for query in latest_measurements)
+        )
+
+        user = user_snapshots[0].to_dict() if user_snapshots and user_snapshots[0].exists else None
+        return {
+            'user': user,
+            'upcoming_medications': [doc.to_dict() for doc in medication_docs],
+            'next_appointment': appointment_docs[0].to_dict() if appointment_docs else None,
+            'latest_measurements': {
+                m_type: docs[0].to_dict()
+                for m_type, docs in zip(MEASUREMENT_TYPES, measurement_docs)
+                if docs
+            }
+        }
+    
     #Add appointment
-    def add_appointment(self, user_id, appointment_data):
-        """Add a new appointment for a user"""
+    def add_appointment(self, user_id, appointment_data, now=None):
+        """Add a new appointment for a user and return the stored document"""
         try:
             appointments_ref = self.db.collection('users').document(user_id).collection('appointments')
-            appointment_data['created_at'] = firestore.SERVER_TIMESTAMP
-            appointment_data['updated_at'] = firestore.SERVER_TIMESTAMP
+            # Concrete timestamps instead of SERVER_TIMESTAMP, so the written document can be returned as-is
+            now = now or datetime.now(timezone.utc)
+            appointment_data['created_at'] = now
+            appointment_data['updated_at'] = now
             
             doc_ref = appointments_ref.document()
             appointment_data['id'] = doc_ref.id
             doc_ref.set(appointment_data)
-            return doc_ref.id
+            self._invalidate(user_id, 'appointments')
+            return appointment_data
+        except Exception as e:
+            raise e
+
+    def _appointment_ref(self, user_id, appointment_id):
+        return (self.db.collection('users').document(user_id)
+                .collection('appointments').document(appointment_id))
+
+    #Get appointment
+    def get_appointment(self, user_id, appointment_id):
+        """Get a single appointment for a user, or None if it doesn't exist"""
+        doc = self._appointment_ref(user_id, appointment_id).get()
+        if doc.exists:
+            return doc.to_dict() | {'id': doc.id}
+        return None
+
+    #Check appointment exists
+    def appointment_exists(self, user_id, appointment_id):
+        """Check whether an appointment exists with a single document read"""
+        return self._appointment_ref(user_id, appointment_id).get().exists
+
+    #Mark appointment as reminded
+    def mark_appointment_reminded(self, user_id, appointment_id, reminder_time):
+        """
+        Set an appointment's reminder time in a single transaction
+        
+        Args:
+            user_id (str): The user ID
+            appointment_id (str): The appointment ID
+            reminder_time (datetime): When the reminder was sent
+        
+        Returns:
+            dict: The updated appointment, or None if it doesn't exist
+        """
+        update_data = {'reminder_time': reminder_time, 'updated_at': reminder_time}
+        appointment = _update_if_exists(self.db.transaction(), self._appointment_ref(user_id, appointment_id), update_data)
+        if appointment is not None:
+            self._invalidate(user_id, 'appointments')
+        return appointment
+
+    #Delete appointment and cancel its reminders
+    def batch_delete_appointment_with_reminder(self, user_id, appointment_id):
+        """Delete an appointment and cancel its scheduled reminders in a single batched write"""
+        try:
+            reminders = (self.db.collection('notifications')
+                         .where('user_id', '==', user_id)
+                         .where('appointment_id', '==', appointment_id)
+                         .where('status', '==', 'scheduled')
+                         .get())
+            
+            batch = self.db.batch()
+            batch.delete(self._appointment_ref(user_id, appointment_id))
+            for reminder in reminders:
+                batch.update(reminder.reference, {'status': 'cancelled'})
+            batch.commit()
+            self._invalidate(user_id, 'appointments')
+            return True
+        except Exception as e:
+            raise e
+
+    #Update appointment
+    def update_appointment(self, user_id, appointment_id, appointment_data):
+        """Update an appointment for a user"""
+        try:
+            appointment_ref = self._appointment_ref(user_id, appointment_id)
+            
+            appointment_data['updated_at'] = firestore.SERVER_TIMESTAMP
+            appointment_ref.update(appointment_data)
+            self._invalidate(user_id, 'appointments')
+            return True
         except Exception as e:
             raise e
     
     #Get measurements
-    def get_measurements(self, user_id, measurement_type=None, limit=10):
-        """Get health measurements for a user"""
-        measurements_ref = self.db.collection('users').document(user_id).collection('measurements')
+    def get_measurements(self, user_id, measurement_type=None, limit=10, start=None, end=None, fields=None):
+        """
+        Get health measurements for a user, newest first
         
+        Args:
+            user_id (str): The user ID
+            measurement_type (str, optional): Only return measurements of this type
+            limit (int, optional): Maximum number of measurements to return, or None for no limit
+            start (datetime, optional): Only return measurements taken at or after this time
+            end (datetime, optional): Only return measurements taken at or before this time
+            fields (tuple, optional): Only download these fields of each measurement
+        
+        Returns:
+            list: Measurement data
+        """
+        cache_key = (measurement_type, limit, start, end, fields)
+        measurements = self.read_cache.get(user_id, 'measurements', cache_key)
+        if measurements is not None:
+            return measurements
+
+        query = self.db.collection('users').document(user_id).collection('measurements')
+        
+        # Filtering by type and time range needs the (type, timestamp desc) index in firestore.indexes.json
         if measurement_type:
-            query = measurements_ref.where('type', '==', measurement_type).order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
-        else:
-            query = measurements_ref.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
+            query = query.where('type', '==', measurement_type)
+        if start:
+            query = query.where('timestamp', '>=', start)
+        if end:
+            query = query.where('timestamp', '<=', end)
+        query = query.order_by('timestamp', direction=firestore.Query.DESCENDING)
+        if limit:
+            query = query.limit(limit)
+        if fields:
+            query = query.select(fields)
+        
+        measurements = [_normalize_datetimes(doc.to_dict(), ('timestamp',)) for doc in query.get()]
+        self.read_cache.set(user_id, 'measurements', cache_key, measurements)
+        return measurements
+    
+    #Get measurement by ID
+    def get_measurement_by_id(self, user_id, measurement_id):
+        """Get a single measurement for a user, or None if it doesn't exist"""
+        doc = (self.db.collection('users').document(user_id)
+               .collection('measurements').document(measurement_id).get())
+        if doc.exists:
+            return _normalize_datetimes(doc.to_dict() | {'id': doc.id}, ('timestamp',))
+        return None
+    
+    #Delete measurement
+    def delete_measurement(self, user_id, measurement_id):
+        """
+        Delete a measurement with a single conditional write, no read needed
         
-        measurements = query.get()
-        return [doc.to_dict() for doc in measurements]
+        Returns:
+            bool: False if the measurement doesn't exist
+        """
+        doc_ref = (self.db.collection('users').document(user_id)
+                   .collection('measurements').document(measurement_id))
+        if not self._delete_if_exists(doc_ref):
+            return False
+        self._invalidate(user_id, 'measurements')
+        return True
     
     #Add measurement
     def add_measurement(self, user_id, measurement_data):
         """Add a new health measurement for a user"""
         try:
             measurements_ref = self.db.collection('users').document(user_id).collection('measurements')
-            measurement_data['created_at'] = firestore.SERVER_TIMESTAMP
-            measurement_data['timestamp'] = measurement_data.get('timestamp', firestore.SERVER_TIMESTAMP)
+            # Keep timestamps the caller already set so the stored document matches what it holds
+            measurement_data.setdefault('created_at', firestore.SERVER_TIMESTAMP)
+            measurement_data['timestamp'] = measurement_data.get('timestamp') or measurement_data['created_at']
 
             # Optional safety check
             if "status" not in measurement_data:
@@ -243,6 +717,7 @@ class FirebaseClient:
             doc_ref = measurements_ref.document()
             measurement_data['id'] = doc_ref.id
             doc_ref.set(measurement_data)
+            self._invalidate(user_id, 'measurements')
             return doc_ref.id
         except Exception as e:
             raise e
@@ -284,8 +759,35 @@ class FirebaseClient:
         
             return user_data
         except Exception as e:
-            logging.error(f"Token verification error: {str(e)}")
+            logging.error("Token verification error: %s", e)
             raise e
+
+    # Send a push notification through the FCM HTTP v1 API
+    async def send_fcm(self, token, payload):
+        """
+        Send a push notification to a device over the shared HTTP client
+        
+        Args:
+            token (str): FCM registration token of the target device
+            payload (dict): FCM v1 message fields, e.g. 'notification' and 'data'
+        
+        Returns:
+            str: Message name returned by FCM
+        
+        Raises:
+            httpx.HTTPStatusError: If FCM rejects the message
+        """
+        app = firebase_admin.get_app()
+        # The credential caches its OAuth token, but a refresh is a blocking call
+        access_token = await asyncio.to_thread(lambda: app.credential.get_access_token().access_token)
+
+        response = await self.http.post(
+            FCM_SEND_URL.format(project_id=app.project_id),
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"message": {**payload, "token": token}}
+        )
+        response.raise_for_status()
+        return response.json().get('name')
         
     # Add dependents for a user
     def add_dependent(self, user_id, dependent_data):
@@ -302,11 +804,10 @@ class FirebaseClient:
             raise e
 
     # Get dependents for a user
-    def get_dependents(self, user_id):
+    def get_dependents(self, user_id, limit=None, start_after=None):
         try:
             dependents_ref = self.db.collection('users').document(user_id).collection('dependents')
-            dependents = dependents_ref.get()
-            return [doc.to_dict() for doc in dependents]
+            return self._get_page(dependents_ref, limit, start_after)
         except Exception as e:
             raise e
 
@@ -324,4 +825,12 @@ class FirebaseClient:
         except Exception as e:
             raise e
 
-                
\ No newline at end of file
+                
+_client = None
+
+def get_firebase_client():
+    """Get the FirebaseClient shared by every router and service in this process"""
+    global _client
+    if _client is None:
+        _client = FirebaseClient()
+    return _client
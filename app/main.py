@@ -1,49 +1,75 @@
 # app/main.py
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from routers import users, medications, appointments, measurements, auth, reports
-from config import Settings
+from fastapi.responses import ORJSONResponse
+from routers import users, medications, appointments, measurements, auth, reports, dashboard
+from config import Settings, get_settings
+from firebase_client import get_firebase_client
+from services.auth_service import AuthService
+from services.notification_service import NotificationService
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 # Load environment variables
 dotenv_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(dotenv_path)
 
-# Now you can access the environment variables
-firebase_credentials_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
-print(f"FIREBASE_CREDENTIALS_PATH: {firebase_credentials_path}")
+# Load settings
+settings = get_settings()
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-logging.basicConfig(level=logging.INFO)
+# Configure logging; records are written to stderr by a background thread so handlers never block the event loop
+log_queue = queue.SimpleQueue()
+logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO), handlers=[QueueHandler(log_queue)])
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Firebase client per worker, built here rather than at import, and shared by every route through
+    # dependencies.get_firebase; the services that use it are handed it the same way
+    firebase = app.state.firebase = get_firebase_client()
+    app.state.auth = AuthService(firebase)
+    app.state.notifications = NotificationService(firebase)
+
+    yield
+
+    await app.state.firebase.http.aclose()
+
+    # Flush any queued log records before the worker exits
+    log_listener.stop()
+
 app = FastAPI(
     title="Health Tracker API",
     description="Backend API for Health Tracking Application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Load settings
-settings = Settings()
-
 # Configure CORS
-origins = [
-    "http://localhost",
-    "http://localhost:3000",
-    "http://localhost:8080",
-    "http://localhost:19006",  # React Native Expo default
-    "*"  # For development purposes - restrict in production
-]
+origins = list(settings.BACKEND_CORS_ORIGINS)
+if settings.ENVIRONMENT == "development":
+    origins += [
+        "http://localhost",
+        "http://localhost:3000",
+        "http://localhost:8080",
+        "http://localhost:19006",  # React Native Expo default
+    ]
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
-    allow_credentials=True,
+    # Credentials can't be combined with a wildcard origin
+    allow_credentials="*" not in origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers only let clients read response headers that are exposed explicitly
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -54,17 +80,18 @@ app.include_router(appointments.router, prefix="/api/appointments", tags=["Appoi
 app.include_router(measurements.router, prefix="/api/measurements", tags=["Measurements"])
 # Add the new reports router
 app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Health Tracker API. See /docs for API documentation."}
 
 @app.get("/api/status")
-async def status():
+async def status(settings: Settings = Depends(get_settings)):
     return {
         "status": "operational",
         "version": "1.0.0",
-        "environment": os.getenv("ENVIRONMENT", "development")
+        "environment": settings.ENVIRONMENT
     }
 
 if __name__ == "__main__":
@@ -2,8 +2,8 @@
 from pydantic import BaseModel, Field
 from enum import Enum
 from typing import Optional, Dict, Any, Union
-from datetime import datetime
-import uuid
+from datetime import datetime, timezone
+import msgspec
 
 
 class MeasurementType(str, Enum):
@@ -13,14 +13,16 @@ class MeasurementType(str, Enum):
     TEMPERATURE = "temperature"
     HEART_RATE = "heart_rate"
 
+# Every measurement type's value, in declaration order
+MEASUREMENT_TYPES = tuple(m_type.value for m_type in MeasurementType)
 
-class BloodPressureData(BaseModel):
+class BloodPressureData(msgspec.Struct):
     systolic: int
     diastolic: int
     pulse: Optional[int] = None
 
 
-class BloodSugarData(BaseModel):
+class BloodSugarData(msgspec.Struct):
     value: float
     unit: str = "mg/dL"  # Default unit (alternatives: mmol/L)
     measurement_context: Optional[str] = None  # e.g., "fasting", "after meal"
@@ -35,15 +37,37 @@ class MeasurementBase(BaseModel):
     source: str = "manual"  # "manual" or "image_upload"
 
 
-class MeasurementCreate(BaseModel):
+class MeasurementCreate(msgspec.Struct):
+    """Measurement ingestion body, decoded and validated by msgspec instead of Pydantic"""
+
     type: str
-    value: Union[float, BloodPressureData, BloodSugarData]
+    # msgspec unions can hold only one untagged Struct type, so object values
+    # are decoded as dicts and converted in __post_init__
+    value: Union[float, Dict[str, Any]]
     unit: str
     timestamp: Optional[datetime] = None
     notes: Optional[str] = None
     source: str = "manual"
     status: Optional[str] = None
 
+    def __post_init__(self):
+        if isinstance(self.value, dict):
+            # Same order Pydantic used when value was Union[float, BloodPressureData, BloodSugarData]
+            for data_type in (BloodPressureData, BloodSugarData):
+                try:
+                    self.value = msgspec.convert(self.value, data_type)
+                    return
+                except msgspec.ValidationError:
+                    continue
+            raise ValueError("value must be a number, blood pressure data or blood sugar data")
+
+
+measurement_create_decoder = msgspec.json.Decoder(MeasurementCreate)
+
+# OpenAPI schema of the body, for the docs of routes that decode it with measurement_create_decoder
+_, _schema_components = msgspec.json.schema_components((MeasurementCreate,))
+MEASUREMENT_CREATE_SCHEMA = _schema_components["MeasurementCreate"]
+
 
 class MeasurementResponse(MeasurementBase):
     id: str
@@ -54,26 +78,37 @@ class MeasurementDB(BaseModel):
     """Helper class for converting between API models and Firebase storage"""
     
     @staticmethod
-    def to_db_format(measurement: MeasurementBase, user_id: str) -> Dict[str, Any]:
+    def to_db_format(measurement: MeasurementBase, user_id: str, now: Optional[datetime] = None) -> Dict[str, Any]:
         """Convert measurement model to Firebase database format"""
-        measurement_data = measurement.model_dump()
-        
-        # Add additional fields for Firebase
-        measurement_data["id"] = str(uuid.uuid4())
-        measurement_data["user_id"] = user_id
-        measurement_data["created_at"] = datetime.now()
-        
-        # Set timestamp to now if not provided
-        if not measurement_data.get("timestamp"):
-            measurement_data["timestamp"] = datetime.now()
+        # Read the fields directly rather than walking the whole model with model_dump()
+        value = measurement.value
+        if isinstance(value, msgspec.Struct):
+            value = msgspec.structs.asdict(value)
+        elif isinstance(value, BaseModel):
+            value = value.model_dump()
+        now = now or datetime.now(timezone.utc)
+        measurement_data = {
+            "type": measurement.type,
+            "value": value,
+            "unit": measurement.unit,
+            # Set timestamp to now if not provided
+            "timestamp": measurement.timestamp or now,
+            "notes": measurement.notes,
+            "source": measurement.source,
+            # Add additional fields for Firebase; the id comes from the Firestore document
+            "user_id": user_id,
+            "created_at": now
+        }
+        if hasattr(measurement, "status"):
+            measurement_data["status"] = measurement.status
         
         return measurement_data
     
     @staticmethod
-    def from_blood_pressure_ocr(data: Dict[str, Any], user_id: str, notes: Optional[str] = None) -> Dict[str, Any]:
+    def from_blood_pressure_ocr(data: Dict[str, Any], user_id: str, notes: Optional[str] = None, now: Optional[datetime] = None) -> Dict[str, Any]:
         """Create a blood pressure measurement from OCR data"""
+        now = now or datetime.now(timezone.utc)
         return {
-            "id": str(uuid.uuid4()),
             "user_id": user_id,
             "type": "blood_pressure",
             "value": {
@@ -82,23 +117,23 @@ class MeasurementDB(BaseModel):
                 "pulse": data.get("pulse")
             },
             "unit": "mmHg",
-            "timestamp": datetime.now(),
+            "timestamp": now,
             "notes": notes,
             "source": "image_upload",
-            "created_at": datetime.now()
+            "created_at": now
         }
     
     @staticmethod
-    def from_blood_sugar_ocr(data: Dict[str, Any], user_id: str, notes: Optional[str] = None) -> Dict[str, Any]:
+    def from_blood_sugar_ocr(data: Dict[str, Any], user_id: str, notes: Optional[str] = None, now: Optional[datetime] = None) -> Dict[str, Any]:
         """Create a blood sugar measurement from OCR data"""
+        now = now or datetime.now(timezone.utc)
         return {
-            "id": str(uuid.uuid4()),
             "user_id": user_id,
             "type": "blood_sugar",
             "value": data["value"],
             "unit": data.get("unit", "mg/dL"),
-            "timestamp": datetime.now(),
+            "timestamp": now,
             "notes": notes,
             "source": "image_upload",
-            "created_at": datetime.now()
+            "created_at": now
         }
\ No newline at end of file
@@ -0,0 +1,65 @@
+# app/read_cache.py
+import pickle
+import threading
+
+from cachetools import TTLCache
+
+class ReadCache:
+    """
+    TTL cache for per-user Firestore reads, dropped whenever the user writes. Lives in Redis when a URL is
+    configured so a write on one worker is seen by every worker, otherwise in a thread-safe in-process cache.
+
+    In-process hits return the cached objects themselves, so callers must not mutate them
+    """
+
+    def __init__(self, redis_url=None, maxsize=10000, ttl=30):
+        self.ttl = ttl
+        self._redis = None
+        if redis_url:
+            # Only imported when Redis is configured
+            import redis
+
+            self._redis = redis.Redis.from_url(redis_url)
+        else:
+            # One entry per (user, collection), holding every cached query for it, so a write can drop them all at once
+            self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+            self._lock = threading.Lock()
+
+    def _key(self, user_id, collection):
+        # A hash per (user, collection) with a field per query, so a write drops them all in one DELETE
+        return f"read:{user_id}:{collection}"
+
+    def get(self, user_id, collection, key):
+        """Return the cached result of a query, or None on a miss"""
+        if self._redis is None:
+            with self._lock:
+                entries = self._cache.get((user_id, collection))
+                if entries is None:
+                    return None
+                return entries.get(key)
+        # Pickled rather than JSON so Firestore datetimes come back as datetimes
+        data = self._redis.hget(self._key(user_id, collection), repr(key))
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, user_id, collection, key, value):
+        """Cache the result of a query"""
+        if self._redis is None:
+            with self._lock:
+                entries = self._cache.get((user_id, collection))
+                if entries is None:
+                    entries = self._cache[(user_id, collection)] = {}
+                entries[key] = value
+            return
+        redis_key = self._key(user_id, collection)
+        pipe = self._redis.pipeline()
+        pipe.hset(redis_key, repr(key), pickle.dumps(value))
+        pipe.expire(redis_key, self.ttl)
+        pipe.execute()
+
+    def invalidate(self, user_id, collection):
+        """Drop every cached query for a user's collection"""
+        if self._redis is None:
+            with self._lock:
+                self._cache.pop((user_id, collection), None)
+            return
+        self._redis.delete(self._key(user_id, collection))
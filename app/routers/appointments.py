@@ -1,23 +1,38 @@
 # app/routers/appointments.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from models.appointment import AppointmentCreate, AppointmentUpdate, AppointmentResponse
-from typing import List
+from typing import List, Optional, Annotated
 from datetime import datetime
 from routers.auth import get_current_user
-from firebase_client import FirebaseClient
-from services.notification_service import NotificationService
+from dependencies import request_now, get_firebase
+from firebase_client import FirebaseClient, InvalidCursor
+import asyncio
 import logging
 
 router = APIRouter()
-firebase_client = FirebaseClient()
-notification_service = NotificationService()
+logger = logging.getLogger(__name__)
 
 @router.get("/", response_model=List[AppointmentResponse])
-async def get_appointments(current_user = Depends(get_current_user)):
-    """Get all appointments for the current user"""
+async def get_appointments(
+    response: Response,
+    limit: Annotated[Optional[int], Query(ge=1, le=100)] = None,
+    start_after: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
+):
+    """Get the current user's appointments, newest first; with a limit, one page at a time"""
     try:
-        appointments = firebase_client.get_appointments(current_user['id'])
-        return appointments
+        page = await asyncio.to_thread(fb.get_appointments, current_user['id'], limit=limit, start_after=start_after)
+
+        # Cursor for the next page, passed back as start_after
+        if page['next']:
+            response.headers['X-Next-Cursor'] = page['next']
+        return page['items']
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid start_after cursor"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -25,10 +40,14 @@ async def get_appointments(current_user = Depends(get_current_user)):
         )
 
 @router.get("/upcoming", response_model=List[AppointmentResponse])
-async def get_upcoming_appointments(current_user = Depends(get_current_user)):
+async def get_upcoming_appointments(
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
+):
     """Get upcoming appointments for the current user"""
     try:
-        appointments = firebase_client.get_upcoming_appointments(current_user['id'])
+        appointments = await asyncio.to_thread(fb.get_upcoming_appointments, current_user['id'], now=now)
         return appointments
     except Exception as e:
         raise HTTPException(
@@ -39,17 +58,19 @@ async def get_upcoming_appointments(current_user = Depends(get_current_user)):
 @router.post("/", response_model=AppointmentResponse)
 async def create_appointment(
     appointment: AppointmentCreate, 
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Create a new appointment for the current user"""
     try:
-        appointment_data = appointment.dict()  # Use .dict() instead of .model_dump()
+        appointment_data = appointment.model_dump()
 
         # Set reminder_time to None initially
         appointment_data['reminder_time'] = appointment_data.get('reminder_time', None)
 
         # Log the incoming appointment data for debugging
-        logging.info(f"Appointment data: {appointment_data}")
+        logger.info("Appointment data: %s", appointment_data)
 
         if appointment_data['appointment_date'] is None:
             raise HTTPException(
@@ -57,26 +78,18 @@ async def create_appointment(
                 detail="Appointment date is required and cannot be None"
             )
         
-        appointment_id = firebase_client.add_appointment(current_user['id'], appointment_data)
+        created_appointment = await asyncio.to_thread(fb.add_appointment, current_user['id'], appointment_data, now=now)
         
         # # Schedule notification for this appointment
         # notification_service.schedule_appointment_reminder(
         #     user_id=current_user['id'],
-        #     appointment_id=appointment_id,
+        #     appointment_id=created_appointment['id'],
         #     appointment_title=appointment_data['title'],
         #     reminder_time=appointment_data.get('reminder_time')
         # )
         
         # Return the created appointment
-        created_appointment = firebase_client.get_appointments(current_user['id'])
-        for app in created_appointment:
-            if app.get('id') == appointment_id:
-                return app
-        
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Appointment created but could not be retrieved"
-        )
+        return created_appointment
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -87,32 +100,27 @@ async def create_appointment(
 async def update_appointment(
     appointment_id: str,
     appointment: AppointmentUpdate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Update an appointment for the current user"""
     try:
-        appointment_data = {k: v for k, v in appointment.dict().items() if v is not None}
+        appointment_data = appointment.model_dump(exclude_none=True, exclude_unset=True)
         
         # Update the appointment
-        firebase_client.update_appointment(current_user['id'], appointment_id, appointment_data)
+        await asyncio.to_thread(fb.update_appointment, current_user['id'], appointment_id, appointment_data)
+        updated_app = await asyncio.to_thread(fb.get_appointment, current_user['id'], appointment_id)
         
-        if 'reminder_time' in appointment_data:
-            # Get the updated appointment to get the new reminder_time
-            appointments = firebase_client.get_appointments(current_user['id'])
-            updated_app = next((a for a in appointments if a.get('id') == appointment_id), None)
-            
-            # if updated_app and 'reminder_time' in updated_app:
-            #     notification_service.schedule_appointment_reminder(
-            #         user_id=current_user['id'],
-            #         appointment_id=appointment_id,
-            #         appointment_title=updated_app.get('title'),
-            #         reminder_time=updated_app.get('reminder_time')
-            #     )
+        # if 'reminder_time' in appointment_data and updated_app and 'reminder_time' in updated_app:
+        #     notification_service.schedule_appointment_reminder(
+        #         user_id=current_user['id'],
+        #         appointment_id=appointment_id,
+        #         appointment_title=updated_app.get('title'),
+        #         reminder_time=updated_app.get('reminder_time')
+        #     )
         
-        appointments = firebase_client.get_appointments(current_user['id'])
-        for app in appointments:
-            if app.get('id') == appointment_id:
-                return app
+        if updated_app:
+            return updated_app
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -127,22 +135,19 @@ async def update_appointment(
 @router.delete("/{appointment_id}")
 async def delete_appointment(
     appointment_id: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Delete an appointment for the current user"""
     try:
-        appointments = firebase_client.get_appointments(current_user['id'])
-        appointment = next((a for a in appointments if a.get('id') == appointment_id), None)
-        
-        if not appointment:
+        if not await asyncio.to_thread(fb.appointment_exists, current_user['id'], appointment_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Appointment not found"
             )
         
-        result = firebase_client.db.collection('users').document(current_user['id']).collection('appointments').document(appointment_id).delete()
-        
-        notification_service.cancel_appointment_reminder(current_user['id'], appointment_id)
+        # Delete the appointment and cancel its reminders in one commit
+        await asyncio.to_thread(fb.batch_delete_appointment_with_reminder, current_user['id'], appointment_id)
         
         return {"message": "Appointment deleted successfully"}
     except HTTPException as e:
@@ -156,35 +161,21 @@ async def delete_appointment(
 @router.post("/{appointment_id}/reminder")
 async def mark_appointment_as_reminded(
     appointment_id: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Mark an appointment as reminded"""
     try:
-        appointments = firebase_client.get_appointments(current_user['id'])
-        appointment = next((a for a in appointments if a.get('id') == appointment_id), None)
-        
-        if not appointment:
+        # Existence check and update happen in one transaction
+        updated_app = await asyncio.to_thread(fb.mark_appointment_reminded, current_user['id'], appointment_id, now)
+        if not updated_app:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Appointment not found"
             )
         
-        now = datetime.now()
-        appointment_data = {
-            'reminder_time': now
-        }
-        
-        firebase_client.update_appointment(current_user['id'], appointment_id, appointment_data)
-        
-        appointments = firebase_client.get_appointments(current_user['id'])
-        for app in appointments:
-            if app.get('id') == appointment_id:
-                return app
-        
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Appointment not found after update"
-        )
+        return updated_app
     except HTTPException as e:
         raise e
     except Exception as e:
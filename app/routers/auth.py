@@ -4,16 +4,13 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field, EmailStr
 from typing import Optional
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from config import Settings
+import asyncio
 from services.auth_service import AuthService
 from firebase_client import FirebaseClient
+from dependencies import get_firebase, get_auth_service
 
 router = APIRouter()
-settings = Settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
-auth_service = AuthService()
-firebase_client = FirebaseClient()
 
 class Token(BaseModel):
     access_token: str
@@ -30,33 +27,37 @@ class UserCreate(BaseModel):
     phone: Optional[str] = None
 
 #Get current user
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    fb: FirebaseClient = Depends(get_firebase),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
+    # Only the token's subject is cached; the profile comes from the user cache, which updates keep current
+    user_id = auth_service.verify_token(token)
+    if user_id is None:
         raise credentials_exception
-    
-    user = firebase_client.get_user(token_data.user_id)
+
+    user = await fb.aget_user(user_id)
     if user is None:
         raise credentials_exception
     return user
 
 #Register user
 @router.post("/register", response_model=Token)
-async def register_user(user_data: UserCreate):
+async def register_user(
+    user_data: UserCreate,
+    fb: FirebaseClient = Depends(get_firebase),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     # Check if email already exists
     try:
         # Create user and get user_id
-        user_id = firebase_client.create_user(user_data.model_dump())
+        user_id = await asyncio.to_thread(fb.create_user, user_data.model_dump())
         
         # Create access token
         access_token = auth_service.create_access_token(
@@ -76,9 +77,12 @@ async def register_user(user_data: UserCreate):
 
 #Login
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     try:
-        user = auth_service.authenticate_user(form_data.username, form_data.password)
+        user = await auth_service.authenticate_user(form_data.username, form_data.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
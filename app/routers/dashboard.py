@@ -0,0 +1,32 @@
+# app/routers/dashboard.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from routers.auth import get_current_user
+from dependencies import request_now, get_firebase
+from firebase_client import FirebaseClient
+
+router = APIRouter()
+
+@router.get("/")
+async def get_dashboard(
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
+):
+    """Get dashboard data for the current user in a single concurrent round of reads"""
+    try:
+        dashboard = await fb.get_dashboard(current_user['id'], now=now)
+        if not dashboard['user']:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return dashboard
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve dashboard: {str(e)}"
+        )
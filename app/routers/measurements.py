@@ -1,24 +1,78 @@
 # app/routers/measurements.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Annotated
 from datetime import datetime, timedelta, timezone
 import io
-import traceback
+import re
+import asyncio
+import msgspec
+import numpy as np
+import logging
+from collections import defaultdict
 
 from routers.auth import get_current_user
+from dependencies import request_now, get_firebase
+from config import get_settings
 from firebase_client import FirebaseClient
-from models.measurement import MeasurementBase, MeasurementCreate, MeasurementResponse, MeasurementDB
+from models.measurement import MeasurementBase, MeasurementResponse, MeasurementDB, measurement_create_decoder, MEASUREMENT_CREATE_SCHEMA, MEASUREMENT_TYPES
 from utils.ocr_processor import OCRProcessor
-#from anomaly_predictor_tf import load_model, predict_anomaly
 
 router = APIRouter()
-firebase_client = FirebaseClient()
-ocr_processor = OCRProcessor()
+logger = logging.getLogger(__name__)
+settings = get_settings()
+# OCR is CPU-bound; a small dedicated pool keeps it off the event loop without oversubscribing the CPU
+ocr_processor = OCRProcessor(max_workers=settings.OCR_WORKERS)
 
-# Load both models once at startup
-# bp_model = load_model("models/bp_model_tf.h5")
-# diabetes_model = load_model("models/diabetes_model_tf.h5")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Measurement types the OCR processor can read from a photo
+OCR_MEASUREMENT_TYPES = ("blood_pressure", "blood_sugar")
+
+# Phrases in a blood sugar reading's notes that identify its measurement context
+_FASTING_TERMS = ("fast", "before meal", "before breakfast")
+_AFTER_MEAL_TERMS = ("after meal", "post", "post meal")
+
+# Fields the stats endpoints read; readings may be nested under 'value' or stored at the top level
+_BP_STATS_FIELDS = ("timestamp", "value", "systolic", "diastolic", "pulse")
+_BS_STATS_FIELDS = ("timestamp", "value", "blood_sugar_value", "measurement_context", "notes")
+
+def _field_values(values, field):
+    """A field from each value dict as a float array, with NaN where it is missing"""
+    return np.fromiter(
+        (np.nan if v.get(field) is None else v[field] for v in values),
+        dtype=np.float64,
+        count=len(values)
+    )
+
+def _summarize(values):
+    """avg/min/max of an array, ignoring NaN entries"""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {"avg": None, "min": None, "max": None}
+    return {"avg": float(values.mean()), "min": float(values.min()), "max": float(values.max())}
+
+def _isoformat(value):
+    # Firestore returns a datetime subclass that orjson refuses to encode
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _measurements_response(measurements):
+    """Encode measurements in MeasurementResponse shape without validating each one through Pydantic"""
+    return ORJSONResponse([
+        {
+            "id": m.get('id'),
+            "type": m.get('type'),
+            "value": m.get('value'),
+            "unit": m.get('unit'),
+            "timestamp": _isoformat(m.get('timestamp')),
+            "notes": m.get('notes'),
+            "source": m.get('source', "manual"),
+            "created_at": _isoformat(m.get('created_at')),
+        }
+        for m in measurements
+    ])
 
 class MeasurementInput(BaseModel):
     user_id: str
@@ -26,60 +80,47 @@ class MeasurementInput(BaseModel):
     value: dict  # could be nested for blood_pressure
     unit: str
 
-@router.get("/", response_model=List[MeasurementResponse])
+@router.get("/", response_model=None, responses={200: {"model": List[MeasurementResponse]}})
 async def get_measurements(
     measurement_type: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     limit: Annotated[int, Query(ge=1, le=100)] = 10,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Get health measurements for the current user with optional filtering"""
+    # Convert input strings to timezone-aware datetimes, each parsed once
+    start_datetime = end_datetime = None
     try:
-        # Convert input strings to timezone-aware datetimes
         if start_date:
             start_datetime = datetime.fromisoformat(start_date)
-        if start_datetime.tzinfo is None:
-            start_datetime = start_datetime.replace(tzinfo=timezone.utc)
+            if start_datetime.tzinfo is None:
+                start_datetime = start_datetime.replace(tzinfo=timezone.utc)
 
         if end_date:
             end_datetime = datetime.fromisoformat(end_date)
-        if end_datetime.tzinfo is None:
-            end_datetime = datetime.fromisoformat(end_date).replace(tzinfo=timezone.utc) + timedelta(days=1)
-        
-        # Use the existing Firebase client method
-        measurements = firebase_client.get_measurements(
+            if end_datetime.tzinfo is None:
+                end_datetime = end_datetime.replace(tzinfo=timezone.utc)
+            # Include the whole end day
+            end_datetime += timedelta(days=1)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date format: {str(e)}"
+        )
+
+    try:
+        # Date filtering happens in the Firestore query, so only the requested window is downloaded
+        measurements = await asyncio.to_thread(fb.get_measurements,
             user_id=current_user['id'], 
             measurement_type=measurement_type,
-            limit=limit
+            limit=limit,
+            start=start_datetime,
+            end=end_datetime
         )
         
-        # Apply additional date filtering if needed (in case Firebase client doesn't support it)
-        if start_datetime or end_datetime:
-            filtered_measurements = []
-            for m in measurements:
-                m_timestamp = m.get('timestamp')
-
-                # Convert string timestamp to datetime if needed
-                if isinstance(m_timestamp, str):
-                    m_timestamp = datetime.fromisoformat(m_timestamp.replace('Z', '+00:00'))
-
-                # Ensure m_timestamp is timezone-aware
-                if m_timestamp.tzinfo is None:
-                    m_timestamp = m_timestamp.replace(tzinfo=timezone.utc)
-
-                # Apply filters
-                if start_datetime and m_timestamp < start_datetime:
-                    continue
-                if end_datetime and m_timestamp > end_datetime:
-                    continue
-
-                filtered_measurements.append(m)
-                print("Filtered out timestamp:", m_timestamp.isoformat())
-
-            return filtered_measurements
-        
-        return measurements
+        return _measurements_response(measurements)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -87,22 +128,18 @@ async def get_measurements(
         )
 
 @router.get("/latest", response_model=Dict[str, MeasurementResponse])
-async def get_latest_measurements(current_user = Depends(get_current_user)):
+async def get_latest_measurements(current_user = Depends(get_current_user), fb: FirebaseClient = Depends(get_firebase)):
     """Get latest measurements of each type for the current user"""
     try:
-        # Define measurement types
-        measurement_types = ["blood_pressure", "blood_sugar", "weight", "temperature", "heart_rate"]
+        # Query every type concurrently, so the handler waits for one round-trip instead of five
+        results = await asyncio.gather(*(
+            asyncio.to_thread(fb.get_measurements, current_user['id'], m_type, 1)
+            for m_type in MEASUREMENT_TYPES
+        ))
         
         latest_measurements = {}
-        
-        for m_type in measurement_types:
-            measurements = firebase_client.get_measurements(
-                user_id=current_user['id'],
-                measurement_type=m_type,
-                limit=1
-            )
-            
-            if measurements and len(measurements) > 0:
+        for m_type, measurements in zip(MEASUREMENT_TYPES, results):
+            if measurements:
                 latest_measurements[m_type] = measurements[0]
         
         return latest_measurements
@@ -112,55 +149,51 @@ async def get_latest_measurements(current_user = Depends(get_current_user)):
             detail=f"Failed to retrieve latest measurements: {str(e)}"
         )
 
-@router.post("/", response_model=MeasurementResponse)
+def _body_errors(e):
+    """Shape a msgspec decode error like the errors FastAPI reports for invalid request bodies"""
+    # msgspec appends the failing path as " - at `$.value.systolic`"
+    msg, _, path = str(e).partition(" - at `$")
+    loc = ["body"] + [int(p) if p.isdigit() else p for p in re.findall(r"[^.\[\]`]+", path)]
+    error_type = "value_error" if isinstance(e, msgspec.ValidationError) else "json_invalid"
+    return [{"type": error_type, "loc": tuple(loc), "msg": msg, "input": None}]
+
+@router.post(
+    "/",
+    response_model=MeasurementResponse,
+    # The body is read by hand, so describe it for the docs
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": MEASUREMENT_CREATE_SCHEMA}},
+            "required": True
+        }
+    }
+)
 async def create_measurement(
-    measurement: MeasurementCreate,
-    current_user = Depends(get_current_user)
+    request: Request,
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
-    print("Received measurement data:", measurement)
     """Create a new health measurement for the current user"""
+    # Decode and validate the body in one pass with msgspec
     try:
-         # Get user profile for AI input
-        user_profile = current_user
-
-        # Convert Pydantic object to dict
-        # measurement_dict = measurement.dict()
-
-        # Predict anomaly using model
-        # if measurement.type == "blood_pressure":
-        #     is_anomaly, msg = predict_anomaly(user_profile, measurement, bp_model, "blood_pressure")
-
-        # elif measurement.type == "blood_sugar":
-        #     is_anomaly, msg = predict_anomaly(user_profile, measurement, diabetes_model, "diabetes")
-        
-        # else:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_400_BAD_REQUEST,
-        #         detail=f"Unsupported measurement type: {measurement.type}"
-        #     )
+        measurement = measurement_create_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        # Same 422 error list as a body validated by FastAPI itself
+        raise RequestValidationError(_body_errors(e))
+    logger.debug("Received measurement data: %s", measurement)
 
-        # Add status field to measurement data
-        # measurement.status = "anomaly" if is_anomaly else "normal"
-        
+    try:
         # Convert to DB format and store
-        measurement_data = MeasurementDB.to_db_format(measurement, current_user['id'])
+        measurement_data = MeasurementDB.to_db_format(measurement, current_user['id'], now=now)
         
         # Add the measurement using existing firebase client
-        measurement_id = firebase_client.add_measurement(current_user['id'], measurement_data)
+        await asyncio.to_thread(fb.add_measurement, current_user['id'], measurement_data)
         
-        # Return the created measurement
-        measurements = firebase_client.get_measurements(current_user['id'])
-        for m in measurements:
-            if m.get('id') == measurement_id:
-                return m
-        
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Measurement created but could not be retrieved"
-        )
+        # The stored document is already in memory, with its new id
+        return measurement_data
     except Exception as e:
-        print("Error during measurement creation:")
-        traceback.print_exc()  # Logs full stack trace to console
+        logger.exception("Error during measurement creation")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create measurement: {str(e)}"
@@ -171,53 +204,60 @@ async def upload_measurement_image(
     measurement_type: str = Form(...),
     image: UploadFile = File(...),
     notes: Optional[str] = Form(None),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Process an uploaded image to extract and save measurement data"""
     # Validate measurement type
-    valid_types = ["blood_pressure", "blood_sugar"]
-    if measurement_type not in valid_types:
+    if measurement_type not in OCR_MEASUREMENT_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid measurement type for image upload. Must be one of: {', '.join(valid_types)}"
+            detail=f"Invalid measurement type for image upload. Must be one of: {', '.join(OCR_MEASUREMENT_TYPES)}"
+        )
+    
+    # Reject oversized uploads before reading them, when the client sent a size
+    if image.size is not None and image.size > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image too large. Maximum size is {settings.MAX_UPLOAD_BYTES} bytes"
         )
     
+    # Read image file in chunks, stopping as soon as it goes over the limit
+    contents = bytearray()
+    while chunk := await image.read(UPLOAD_CHUNK_SIZE):
+        contents += chunk
+        if len(contents) > settings.MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image too large. Maximum size is {settings.MAX_UPLOAD_BYTES} bytes"
+            )
+    
     try:
-        # Read image file
-        contents = await image.read()
-        
         # Process image with OCR
-        extracted_data = ocr_processor.process_image(contents, measurement_type)
+        extracted_data = await ocr_processor.process_image_async(contents, measurement_type)
         
         # Create measurement based on type
         if measurement_type == "blood_pressure":
             measurement_data = MeasurementDB.from_blood_pressure_ocr(
                 data=extracted_data, 
                 user_id=current_user['id'],
-                notes=notes
+                notes=notes,
+                now=now
             )
         else:  # Blood sugar
             measurement_data = MeasurementDB.from_blood_sugar_ocr(
                 data=extracted_data, 
                 user_id=current_user['id'],
-                notes=notes
+                notes=notes,
+                now=now
             )
         
-        # Save to Firebase
-        measurement_id = firebase_client.add_measurement(current_user['id'], measurement_data)
-        
-        # Get the saved measurement
-        measurements = firebase_client.get_measurements(current_user['id'])
-        saved_measurement = next((m for m in measurements if m.get('id') == measurement_id), None)
-        
-        if not saved_measurement:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Measurement created but could not be retrieved"
-            )
+        # Save to Firebase; the stored document is already in memory, with its new id
+        await asyncio.to_thread(fb.add_measurement, current_user['id'], measurement_data)
         
         return {
-            **saved_measurement,
+            **measurement_data,
             "extracted_data": extracted_data  # Include the raw extracted data for reference
         }
         
@@ -232,38 +272,40 @@ async def upload_measurement_image(
             detail=f"Failed to process image: {str(e)}"
         )
 
-@router.get("/blood-pressure", response_model=List[MeasurementResponse])
+@router.get("/blood-pressure", response_model=None, responses={200: {"model": List[MeasurementResponse]}})
 async def get_blood_pressure(
     limit: Annotated[int, Query(ge=1, le=100)] = 10,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Get blood pressure measurements for the current user"""
     try:
-        measurements = firebase_client.get_measurements(
+        measurements = await asyncio.to_thread(fb.get_measurements,
             user_id=current_user['id'],
             measurement_type="blood_pressure",
             limit=limit
         )
-        return measurements
+        return _measurements_response(measurements)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve blood pressure measurements: {str(e)}"
         )
 
-@router.get("/blood-sugar", response_model=List[MeasurementResponse])
+@router.get("/blood-sugar", response_model=None, responses={200: {"model": List[MeasurementResponse]}})
 async def get_blood_sugar(
     limit: Annotated[int, Query(ge=1, le=100)] = 10,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Get blood sugar measurements for the current user"""
     try:
-        measurements = firebase_client.get_measurements(
+        measurements = await asyncio.to_thread(fb.get_measurements,
             user_id=current_user['id'],
             measurement_type="blood_sugar",
             limit=limit
         )
-        return measurements
+        return _measurements_response(measurements)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -273,80 +315,43 @@ async def get_blood_sugar(
 @router.get("/stats/blood-pressure", response_model=Dict[str, Any])
 async def get_blood_pressure_stats(
     days: int = 30,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Get statistical data about blood pressure measurements"""
     try:
         # Calculate date range
-        end_date = datetime.now()
+        end_date = now
         start_date = end_date - timedelta(days=days)
         
-        # Get measurements
-        measurements = firebase_client.get_measurements(
+        # Get every measurement in the date range
+        filtered_measurements = await asyncio.to_thread(fb.get_measurements,
             user_id=current_user['id'],
-            measurement_type="blood_pressure"
+            measurement_type="blood_pressure",
+            limit=None,
+            start=start_date,
+            end=end_date,
+            fields=_BP_STATS_FIELDS
         )
         
-        # Filter by date range
-        filtered_measurements = []
-        for m in measurements:
-            timestamp = m.get('timestamp')
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            
-            if start_date <= timestamp <= end_date:
-                filtered_measurements.append(m)
-        
-        # Extract values
-        systolic_values = []
-        diastolic_values = []
-        pulse_values = []
-        
-        for m in filtered_measurements:
-            value = m.get('value', {})
-            
-            # Handle different data structures
-            if isinstance(value, dict):
-                # Complex object format
-                if 'systolic' in value:
-                    systolic_values.append(value['systolic'])
-                if 'diastolic' in value:
-                    diastolic_values.append(value['diastolic'])
-                if 'pulse' in value:
-                    pulse_values.append(value['pulse'])
-            else:
-                # If value is stored in a different format, try to extract from top level
-                if 'systolic' in m:
-                    systolic_values.append(m['systolic'])
-                if 'diastolic' in m:
-                    diastolic_values.append(m['diastolic'])
-                if 'pulse' in m:
-                    pulse_values.append(m['pulse'])
+        # Readings are either nested under 'value' or stored at the top level
+        values = [m['value'] if isinstance(m.get('value'), dict) else m for m in filtered_measurements]
+        pulse_values = _field_values(values, 'pulse')
         
         # Calculate statistics
         stats = {
             "count": len(filtered_measurements),
             "period_days": days,
-            "systolic": {
-                "avg": sum(systolic_values) / len(systolic_values) if systolic_values else None,
-                "min": min(systolic_values) if systolic_values else None,
-                "max": max(systolic_values) if systolic_values else None
-            },
-            "diastolic": {
-                "avg": sum(diastolic_values) / len(diastolic_values) if diastolic_values else None,
-                "min": min(diastolic_values) if diastolic_values else None,
-                "max": max(diastolic_values) if diastolic_values else None
-            }
+            "systolic": _summarize(_field_values(values, 'systolic')),
+            "diastolic": _summarize(_field_values(values, 'diastolic'))
         }
         
-        if pulse_values:
-            stats["pulse"] = {
-                "avg": sum(pulse_values) / len(pulse_values),
-                "min": min(pulse_values),
-                "max": max(pulse_values)
-            }
+        if not np.isnan(pulse_values).all():
+            stats["pulse"] = _summarize(pulse_values)
         
-        return stats
+        # Stats are plain floats and strings already, so skip FastAPI's jsonable_encoder pass and hand them straight to orjson
+        return ORJSONResponse(stats)
     
     except Exception as e:
         raise HTTPException(
@@ -357,33 +362,29 @@ async def get_blood_pressure_stats(
 @router.get("/stats/blood-sugar", response_model=Dict[str, Any])
 async def get_blood_sugar_stats(
     days: int = 30,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Get statistical data about blood sugar measurements"""
     try:
         # Calculate date range
-        end_date = datetime.now()
+        end_date = now
         start_date = end_date - timedelta(days=days)
         
-        # Get measurements
-        measurements = firebase_client.get_measurements(
+        # Get every measurement in the date range
+        filtered_measurements = await asyncio.to_thread(fb.get_measurements,
             user_id=current_user['id'],
-            measurement_type="blood_sugar"
+            measurement_type="blood_sugar",
+            limit=None,
+            start=start_date,
+            end=end_date,
+            fields=_BS_STATS_FIELDS
         )
         
-        # Filter by date range
-        filtered_measurements = []
-        for m in measurements:
-            timestamp = m.get('timestamp')
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            
-            if start_date <= timestamp <= end_date:
-                filtered_measurements.append(m)
-        
         # Extract values and group by context
         all_values = []
-        context_groups = {}
+        context_groups = defaultdict(list)
         
         for m in filtered_measurements:
             # Extract value based on structure
@@ -409,26 +410,18 @@ async def get_blood_sugar_stats(
                 elif 'notes' in m and m['notes']:
                     # Try to infer context from notes
                     lower_notes = m['notes'].lower()
-                    if any(term in lower_notes for term in ['fast', 'before meal', 'before breakfast']):
+                    if any(term in lower_notes for term in _FASTING_TERMS):
                         context = 'fasting'
-                    elif any(term in lower_notes for term in ['after meal', 'post', 'post meal']):
+                    elif any(term in lower_notes for term in _AFTER_MEAL_TERMS):
                         context = 'after meal'
                 
-                context = context or 'unknown'
-                
-                if context not in context_groups:
-                    context_groups[context] = []
-                context_groups[context].append(value)
+                context_groups[context or 'unknown'].append(value)
         
         # Calculate statistics
         stats = {
             "count": len(filtered_measurements),
             "period_days": days,
-            "overall": {
-                "avg": sum(all_values) / len(all_values) if all_values else None,
-                "min": min(all_values) if all_values else None,
-                "max": max(all_values) if all_values else None
-            },
+            "overall": _summarize(np.array(all_values, dtype=np.float64)),
             "by_context": {}
         }
         
@@ -436,12 +429,11 @@ async def get_blood_sugar_stats(
         for context, values in context_groups.items():
             stats["by_context"][context] = {
                 "count": len(values),
-                "avg": sum(values) / len(values),
-                "min": min(values),
-                "max": max(values)
+                **_summarize(np.array(values, dtype=np.float64))
             }
         
-        return stats
+        # Stats are plain floats and strings already, so skip FastAPI's jsonable_encoder pass and hand them straight to orjson
+        return ORJSONResponse(stats)
     
     except Exception as e:
         raise HTTPException(
@@ -452,23 +444,18 @@ async def get_blood_sugar_stats(
 @router.delete("/{measurement_id}")
 async def delete_measurement(
     measurement_id: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Delete a health measurement for the current user"""
     try:
-        # Check if the measurement exists and belongs to the user
-        measurements = firebase_client.get_measurements(current_user['id'])
-        measurement = next((m for m in measurements if m.get('id') == measurement_id), None)
-        
-        if not measurement:
+        # One conditional delete instead of reading the whole collection to check ownership
+        if not await asyncio.to_thread(fb.delete_measurement, current_user['id'], measurement_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Measurement not found"
             )
         
-        # Delete the measurement
-        result = firebase_client.db.collection('users').document(current_user['id']).collection('measurements').document(measurement_id).delete()
-        
         return {"message": "Measurement deleted successfully"}
     except HTTPException as e:
         raise e
@@ -485,7 +472,7 @@ async def delete_measurement(
 #        if not user:
 #            raise HTTPException(status_code=404, detail="User not found")
 
-#        is_anomalous, message = detect_anomaly(user, measurement.dict())
+#        is_anomalous, message = detect_anomaly(user, measurement.model_dump())
 #        return {
 #            "anomaly": is_anomalous,
 #            "message": message
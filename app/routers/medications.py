@@ -1,30 +1,43 @@
 # app/routers/medications.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from models.medication import MedicationCreate, MedicationUpdate, MedicationResponse
-from typing import List
+from typing import List, Optional, Annotated
 from datetime import datetime, timedelta
 from routers.auth import get_current_user
-from firebase_client import FirebaseClient
+from dependencies import request_now, get_firebase, get_notifications
+from firebase_client import FirebaseClient, InvalidCursor
 from services.notification_service import NotificationService
+import asyncio
 import logging
-import traceback
 
 router = APIRouter()
-firebase_client = FirebaseClient()
-notification_service = NotificationService()
+logger = logging.getLogger(__name__)
 
 #Get medications
 @router.get("/", response_model=List[MedicationResponse])
-async def get_medications(current_user = Depends(get_current_user)):
-    """Get all medications for the current user"""
+async def get_medications(
+    response: Response,
+    limit: Annotated[Optional[int], Query(ge=1, le=100)] = None,
+    start_after: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
+):
+    """Get the current user's medications, newest first; with a limit, one page at a time"""
     try:
-        print(f"Fetching medications for user: {current_user['id']}")
-        medications = firebase_client.get_medications(current_user['id'])
-        print(f"Retrieved {len(medications)} medications")
+        page = await asyncio.to_thread(fb.get_medications, current_user['id'], limit=limit, start_after=start_after)
+        medications = page['items']
+
+        # Cursor for the next page, passed back as start_after
+        if page['next']:
+            response.headers['X-Next-Cursor'] = page['next']
         return medications
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid start_after cursor"
+        )
     except Exception as e:
-        print(f"Error details: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Failed to retrieve medications for user %s", current_user['id'])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve medications: {str(e)}"
@@ -32,10 +45,14 @@ async def get_medications(current_user = Depends(get_current_user)):
 
 #Get upcoming medications
 @router.get("/upcoming", response_model=List[MedicationResponse])
-async def get_upcoming_medications(current_user = Depends(get_current_user)):
+async def get_upcoming_medications(
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
+):
     """Get upcoming medications for the current user"""
     try:
-        medications = firebase_client.get_upcoming_medications(current_user['id'])
+        medications = await asyncio.to_thread(fb.get_upcoming_medications, current_user['id'], now=now)
         return medications
     except Exception as e:
         raise HTTPException(
@@ -43,55 +60,50 @@ async def get_upcoming_medications(current_user = Depends(get_current_user)):
             detail=f"Failed to retrieve upcoming medications: {str(e)}"
         )
 
+def _new_medication_data(medication: MedicationCreate):
+    """Validate a new medication and build its document, with the first dose already scheduled"""
+    if medication.start_date is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date is required and cannot be None"
+        )
+    if medication.frequency is None or medication.frequency <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Frequency must be a positive integer"
+        )
+
+    medication_data = medication.model_dump()
+    logger.debug("Medication data (before processing): %s", medication_data)
+
+    # Set last_taken to None initially
+    medication_data['last_taken'] = None
+
+    # First dose is on the start date at the preferred time, if there is one
+    if medication.preferred_time:
+        hour, minute = medication.preferred_time.split(":")
+        medication_data['next_dose'] = medication.start_date.replace(
+            hour=int(hour), minute=int(minute), second=0, microsecond=0
+        )
+    else:
+        medication_data['next_dose'] = medication.start_date + timedelta(hours=medication.frequency)
+    logger.debug("Calculated next dose: %s", medication_data['next_dose'])
+
+    return medication_data
+
 #Create medication
 @router.post("/", response_model=MedicationResponse)
 async def create_medication(
     medication: MedicationCreate, 
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Create a new medication for the current user"""
     try:
-        logging.info(f"Received medication: {medication}")
-        medication_data = medication.dict(exclude_unset=False)  # Use .dict() instead of .model_dump()
-        logging.info(f"Medication data (before processing): {medication_data}")
-
-        # Set last_taken to None initially
-        medication_data['last_taken'] = None
-
-        # Ensure preferred_time is stored
-        if medication.preferred_time:
-            preferred_hour, preferred_minute = map(int, medication.preferred_time.split(":"))
-            start_date_with_time = medication_data['start_date'].replace(
-                hour=preferred_hour,
-                minute=preferred_minute,
-                second=0,
-                microsecond=0
-            )
-            medication_data['next_dose'] = start_date_with_time
-            logging.info(f"Calculated next dose (preferred time): {start_date_with_time}")
-        else:
-            medication_data['next_dose'] = medication_data['start_date'] + timedelta(hours=medication_data['frequency'])
-            logging.info(f"Calculated next dose (default): {medication_data['next_dose']}")
-            
-        # Log the incoming medication data for debugging
-        logging.info(f"Medication data: {medication_data}")
-
-        logging.info(f"Start date type: {type(medication_data['start_date'])}")
-        logging.info(f"Frequency type: {type(medication_data['frequency'])}")
-
-        if medication_data['start_date'] is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Start date is required and cannot be None"
-            )
-        if medication_data['frequency'] is None or medication_data['frequency'] <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Frequency must be a positive integer"
-            )
+        medication_data = _new_medication_data(medication)
 
-        medication_id = firebase_client.add_medication(current_user['id'], medication_data)
-        logging.info(f"Medication ID returned: {medication_id}")
+        medication_id = await asyncio.to_thread(fb.add_medication, current_user['id'], medication_data)
+        logger.info("Medication created with ID: %s", medication_id)
         
         # # Schedule notification for this medication
         # notification_service.schedule_medication_reminder(
@@ -102,54 +114,84 @@ async def create_medication(
         # )
         
         # Return the created medication
-        created_medication = firebase_client.get_medications(current_user['id'])
-        for med in created_medication:
-            if med.get('id') == medication_id:
-                return med
-        
-        logging.info(f"Created medication response: {created_medication}")
+        created_medication = await asyncio.to_thread(fb.get_medication_by_id, current_user['id'], medication_id)
+        if created_medication:
+            return created_medication
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Medication created but could not be retrieved"
         )
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create medication: {str(e)}"
         )
 
+#Create medications in bulk
+@router.post("/bulk", response_model=List[MedicationResponse])
+async def create_medications(
+    medications: List[MedicationCreate],
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase),
+    notifications: NotificationService = Depends(get_notifications)
+):
+    """Create several medications for the current user in batched writes, e.g. when importing from another app"""
+    try:
+        medications_data = [_new_medication_data(medication) for medication in medications]
+        created_medications = await asyncio.to_thread(fb.add_medications, current_user['id'], medications_data, now=now)
+        logger.info("Created %d medications for user %s", len(created_medications), current_user['id'])
+
+        # One batched write for every reminder rather than one per medication
+        await asyncio.to_thread(notifications.schedule_medication_reminders_bulk, current_user['id'], [
+            {
+                'medication_id': medication['id'],
+                'medication_name': medication['name'],
+                'next_dose': medication['next_dose']
+            }
+            for medication in created_medications
+        ])
+        return created_medications
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create medications: {str(e)}"
+        )
+
 #Update medication
 @router.put("/{medication_id}", response_model=MedicationResponse)
 async def update_medication(
     medication_id: str,
     medication: MedicationUpdate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase),
+    notifications: NotificationService = Depends(get_notifications)
 ):
     """Update a medication for the current user"""
     try:
-        medication_data = {k: v for k, v in medication.dict().items() if v is not None}
+        medication_data = medication.model_dump(exclude_none=True, exclude_unset=True)
         
         # Update the medication
-        firebase_client.update_medication(current_user['id'], medication_id, medication_data)
+        await asyncio.to_thread(fb.update_medication, current_user['id'], medication_id, medication_data)
+        updated_med = await asyncio.to_thread(fb.get_medication_by_id, current_user['id'], medication_id)
         
         if 'last_taken' in medication_data:
-            # Get the updated medication to get the new next_dose
-            medications = firebase_client.get_medications(current_user['id'])
-            updated_med = next((m for m in medications if m.get('id') == medication_id), None)
-            
+            # Use the updated medication to get the new next_dose
             if updated_med and 'next_dose' in updated_med:
-                notification_service.schedule_medication_reminder(
+                await asyncio.to_thread(notifications.schedule_medication_reminder,
                     user_id=current_user['id'],
                     medication_id=medication_id,
                     medication_name=updated_med.get('name'),
                     next_dose=updated_med.get('next_dose')
                 )
         
-        medications = firebase_client.get_medications(current_user['id'])
-        for med in medications:
-            if med.get('id') == medication_id:
-                return med
+        if updated_med:
+            return updated_med
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -165,22 +207,20 @@ async def update_medication(
 @router.delete("/{medication_id}")
 async def delete_medication(
     medication_id: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase),
+    notifications: NotificationService = Depends(get_notifications)
 ):
     """Delete a medication for the current user"""
     try:
-        medications = firebase_client.get_medications(current_user['id'])
-        medication = next((m for m in medications if m.get('id') == medication_id), None)
-        
-        if not medication:
+        # One conditional delete instead of reading the whole collection to check ownership
+        if not await asyncio.to_thread(fb.delete_medication, current_user['id'], medication_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Medication not found"
             )
         
-        result = firebase_client.db.collection('users').document(current_user['id']).collection('medications').document(medication_id).delete()
-        
-        notification_service.cancel_medication_reminder(current_user['id'], medication_id)
+        await asyncio.to_thread(notifications.cancel_medication_reminder, current_user['id'], medication_id)
         
         return {"message": "Medication deleted successfully"}
     except HTTPException as e:
@@ -195,12 +235,13 @@ async def delete_medication(
 @router.post("/{medication_id}/take")
 async def mark_medication_as_taken(
     medication_id: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Mark a medication as taken"""
     try:
-        medications = firebase_client.get_medications(current_user['id'])
-        medication = next((m for m in medications if m.get('id') == medication_id), None)
+        medication = await asyncio.to_thread(fb.get_medication_by_id, current_user['id'], medication_id)
         
         if not medication:
             raise HTTPException(
@@ -208,17 +249,15 @@ async def mark_medication_as_taken(
                 detail="Medication not found"
             )
         
-        now = datetime.now()
         medication_data = {
             'last_taken': now
         }
         
-        firebase_client.update_medication(current_user['id'], medication_id, medication_data)
+        await asyncio.to_thread(fb.update_medication, current_user['id'], medication_id, medication_data)
         
-        medications = firebase_client.get_medications(current_user['id'])
-        for med in medications:
-            if med.get('id') == medication_id:
-                return med
+        updated_med = await asyncio.to_thread(fb.get_medication_by_id, current_user['id'], medication_id)
+        if updated_med:
+            return updated_med
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,19 +1,21 @@
 # app/routers/reports.py
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from fastapi.responses import StreamingResponse
 from enum import Enum
 from typing import Optional
 import logging
 from firebase_client import FirebaseClient
+from dependencies import get_firebase
 from routers.auth import get_current_user
-import traceback
 
 # Import our PDF report generator 
 from report_generator import ReportGenerator
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-firebase_client = FirebaseClient()
+
+def get_report_generator(fb: FirebaseClient = Depends(get_firebase)) -> ReportGenerator:
+    """Get a report generator reading through the worker's shared Firebase client"""
+    return ReportGenerator(fb)
 
 # Create an enum for report types
 class ReportType(str, Enum):
@@ -29,7 +31,8 @@ async def export_pdf(
         ReportType.combined, 
         description="Type of report to generate"
     ),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    report_generator: ReportGenerator = Depends(get_report_generator)
 ):
     """
     Generate a PDF export of user data based on the requested report type.
@@ -40,32 +43,32 @@ async def export_pdf(
     """
     try:
         # Get user ID from authenticated user
-        logger.debug(f"Current user object: {current_user}")
+        logger.debug("Current user object: %s", current_user)
         user_id = current_user.get("id") or current_user.get("user_id")  # ✅ fallback if needed
         
         # Generate the PDF
-        report_generator = ReportGenerator()
-        pdf_buffer = report_generator.generate_pdf_report(user_id, report_type.value)
+        # The authenticated user is already loaded, so the generator doesn't fetch it again
+        pdf_buffer = await report_generator.generate_pdf_report(user_id, report_type.value, user=current_user)
         
         # Determine filename based on report type
         filename = f"{report_type.value}_report_{user_id}.pdf"
         
-        # Return the PDF as a downloadable file
+        # Return the PDF as a downloadable file; it is already fully built in memory, so there is nothing to stream
         headers = {
             'Content-Disposition': f'attachment; filename="{filename}"'
         }
         
-        return StreamingResponse(
-            pdf_buffer, 
+        return Response(
+            content=pdf_buffer.getvalue(),
             media_type='application/pdf',
             headers=headers
         )
     
     except ValueError as e:
-        logger.error(f"Value error in PDF export: {str(e)}")
+        logger.error("Value error in PDF export: %s", e)
         raise HTTPException(status_code=404, detail=str(e))
 
     except Exception as e:
-        logger.error(f"Error generating PDF: {e}")
-        traceback.print_exc()  # This will show the full traceback in the console
+        # The full traceback is only worth its cost when debugging
+        logger.error("PDF export failed for user %s: %s", user_id, e, exc_info=logger.isEnabledFor(logging.DEBUG))
         raise HTTPException(status_code=500, detail="Failed to generate report. Please try again later.")
@@ -1,20 +1,83 @@
 # app/routers/users.py
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Response
 from typing import Dict, Any
 from datetime import datetime
+import asyncio
+import orjson
 
 from routers.auth import get_current_user
+from dependencies import request_now, get_firebase
 from firebase_client import FirebaseClient
 from models.user import UserUpdate, UserResponse, FCMTokenUpdate, EmergencyContactUpdate , DependentsUpdate
+from models.measurement import MEASUREMENT_TYPES
 
 router = APIRouter()
-firebase_client = FirebaseClient()
+
+# What the home screen's medication cards show; the rest of each document isn't downloaded
+HOME_MEDICATION_FIELDS = ['id', 'name', 'dosage', 'frequency', 'preferred_time', 'next_dose', 'end_date']
+
+def _encode_default(value):
+    # Firestore returns a datetime subclass that orjson won't encode natively
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError
+
+def _json_response(data):
+    """Encode raw Firestore data straight with orjson, skipping FastAPI's jsonable_encoder pass"""
+    return Response(orjson.dumps(data, default=_encode_default), media_type="application/json")
+
+# Declared before /{user_id}, which would otherwise match "home-data" as a user id
+@router.get("/home-data")
+async def get_home_data(
+    current_user=Depends(get_current_user),
+    now: datetime = Depends(request_now),
+    fb: FirebaseClient = Depends(get_firebase)
+):
+    """Get data for the home page"""
+    try:
+        user = current_user
+        
+        # Cached per user, never under a shared key, and dropped whenever the user writes
+        cached = await fb.home_cache.aget(user['id'])
+        if cached is not None:
+            return _json_response(cached)
+        
+        # Every read is independent, so they all run concurrently instead of one round-trip after another
+        upcoming_medications, upcoming_appointments, current_medications, *latest = await asyncio.gather(
+            asyncio.to_thread(fb.get_upcoming_medications, user['id'], limit=3, now=now),
+            asyncio.to_thread(fb.get_upcoming_appointments, user['id'], limit=1, now=now),
+            asyncio.to_thread(fb.get_active_medications, user['id'], limit=5, now=now, fields=HOME_MEDICATION_FIELDS),
+            *(asyncio.to_thread(fb.get_measurements, user['id'], m_type, 1) for m_type in MEASUREMENT_TYPES)
+        )
+        next_appointment = upcoming_appointments[0] if upcoming_appointments else None
+        
+        latest_measurements = {
+            m_type: measurements[0]
+            for m_type, measurements in zip(MEASUREMENT_TYPES, latest)
+            if measurements
+        }
+
+        home_data = {
+            "user_name": user.get('name'),
+            "upcoming_medications": upcoming_medications,
+            "next_appointment": next_appointment,
+            "current_medications": current_medications,
+            "latest_measurements": latest_measurements
+        }
+        await fb.home_cache.aset(user['id'], home_data)
+        return _json_response(home_data)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve home data: {str(e)}"
+        )
 
 # Get user profile by ID
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_profile_by_id(
     user_id: str = Path(..., description="The user's ID"),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Get a user's profile by user_id"""
     try:
@@ -22,7 +85,7 @@ async def get_user_profile_by_id(
         if user_id != current_user['id']:
             raise HTTPException(status_code=403, detail="Not authorized to view this profile")
 
-        user = firebase_client.get_user(user_id)
+        user = await fb.aget_user(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return user
@@ -37,16 +100,17 @@ async def get_user_profile_by_id(
 async def update_user_profile_by_id(
     user_data: UserUpdate,
     user_id: str = Path(..., description="The user's ID"),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Update a user's profile by user_id"""
     try:
         if user_id != current_user['id']:
             raise HTTPException(status_code=403, detail="Not authorized to update this profile")
 
-        update_data = {k: v for k, v in user_data.model_dump().items() if v is not None}
-        firebase_client.update_user(user_id, update_data)
-        updated_user = firebase_client.get_user(user_id)
+        update_data = user_data.model_dump(exclude_none=True)
+        # update_user hands back the merged profile, so there is no read after the write
+        updated_user = await asyncio.to_thread(fb.update_user, user_id, update_data)
         return updated_user
     except Exception as e:
         raise HTTPException(
@@ -59,7 +123,8 @@ async def update_user_profile_by_id(
 async def update_user_dependents(
     dependents_data: DependentsUpdate,
     user_id: str = Path(..., description="The user's ID"),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Update the user's dependents"""
     try:
@@ -67,7 +132,7 @@ async def update_user_dependents(
             raise HTTPException(status_code=403, detail="Not authorized to update dependents for this user")
 
         dependents = dependents_data.dependents
-        firebase_client.update_user(user_id, {'dependents': dependents})
+        await asyncio.to_thread(fb.update_user, user_id, {'dependents': dependents})
         return {"message": "Dependents updated successfully"}
     except Exception as e:
         raise HTTPException(
@@ -78,7 +143,8 @@ async def update_user_dependents(
 @router.post("/fcm-token")
 async def update_fcm_token(
     token_data: FCMTokenUpdate,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Update the user's FCM token for push notifications"""
     try:
@@ -87,7 +153,7 @@ async def update_fcm_token(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="FCM token is required"
             )
-        firebase_client.update_user(current_user['id'], {'fcm_token': token_data.token})
+        await asyncio.to_thread(fb.update_user, current_user['id'], {'fcm_token': token_data.token})
         return {"message": "FCM token updated successfully"}
     except Exception as e:
         raise HTTPException(
@@ -98,50 +164,15 @@ async def update_fcm_token(
 @router.post("/emergency-contact")
 async def update_emergency_contact(
     contact_data: EmergencyContactUpdate,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    fb: FirebaseClient = Depends(get_firebase)
 ):
     """Update the user's emergency contact information"""
     try:
-        firebase_client.update_user(current_user['id'], {'emergency_contact': contact_data.model_dump()})
+        await asyncio.to_thread(fb.update_user, current_user['id'], {'emergency_contact': contact_data.model_dump()})
         return {"message": "Emergency contact updated successfully"}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update emergency contact: {str(e)}"
         )
-
-@router.get("/home-data")
-async def get_home_data(current_user=Depends(get_current_user)):
-    """Get data for the home page"""
-    try:
-        user = current_user
-        upcoming_medications = firebase_client.get_upcoming_medications(user['id'], limit=3)
-        upcoming_appointments = firebase_client.get_upcoming_appointments(user['id'], limit=1)
-        next_appointment = upcoming_appointments[0] if upcoming_appointments else None
-        medications = firebase_client.get_medications(user['id'])
-        current_medications = [med for med in medications if not med.get('end_date') or med.get('end_date') > datetime.now()]
-        
-        latest_measurements = {}
-        measurement_types = ["blood_pressure", "blood_sugar", "weight", "temperature", "heart_rate"]
-        for m_type in measurement_types:
-            measurements = firebase_client.get_measurements(
-                user_id=user['id'],
-                measurement_type=m_type,
-                limit=1
-            )
-            if measurements:
-                latest_measurements[m_type] = measurements[0]
-
-        home_data = {
-            "user_name": user.get('name'),
-            "upcoming_medications": upcoming_medications,
-            "next_appointment": next_appointment,
-            "current_medications": current_medications[:5],
-            "latest_measurements": latest_measurements
-        }
-        return home_data
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to retrieve home data: {str(e)}"
-        )
@@ -1,19 +1,30 @@
 # app/services/auth_service.py
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import jwt
-from config import Settings
+import re
+from jose import jwt, jwk
+from config import get_settings
 from firebase_admin import auth as firebase_admin_auth
-from firebase_client import FirebaseClient
-import requests  # Added for REST API request
+from auth_cache import AuthCache
+
+# Three base64url segments; anything else can't be a JWT we issued
+_TOKEN_RE = re.compile(r'^[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+$')
+
+@lru_cache(maxsize=4)
+def _jwt_key(secret_key, algorithm):
+    # Build the verification key once instead of re-parsing the secret on every decode
+    return jwk.construct(secret_key, algorithm)
 
 class AuthService:
     """Service for authentication related operations"""
 
-    def __init__(self):
-        self.settings = Settings()
-        self.firebase_client = FirebaseClient()
+    def __init__(self, firebase_client):
+        self.settings = get_settings()
+        self.firebase_client = firebase_client
+        # Subjects of recently verified tokens, so repeat verifications skip the HMAC check and JSON decode
+        self.token_cache = AuthCache(maxsize=self.settings.AUTH_CACHE_MAX, ttl=self.settings.AUTH_CACHE_TTL)
 
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         """Create a JWT access token"""
@@ -28,7 +39,7 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, self.settings.SECRET_KEY, algorithm=self.settings.ALGORITHM)
         return encoded_jwt
 
-    def authenticate_user(self, email: str, password: str):
+    async def authenticate_user(self, email: str, password: str):
         """Authenticate a user with Firebase REST API"""
         try:
             # Payload to send to Firebase REST API
@@ -38,8 +49,8 @@ class AuthService:
                 "returnSecureToken": True
             }
 
-            # Send request to Firebase REST API
-            response = requests.post(
+            # Send request to Firebase REST API over the shared keep-alive connection pool
+            response = await self.firebase_client.http.post(
                 f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={self.settings.FIREBASE_API_KEY}",
                 json=payload
             )
@@ -47,7 +58,7 @@ class AuthService:
             if response.status_code == 200:
                 user_info = response.json()
                 user_id = user_info["localId"]
-                user_data = self.firebase_client.get_user(user_id)
+                user_data = await self.firebase_client.aget_user(user_id)
                 return user_data
             else:
                 return None
@@ -55,12 +66,27 @@ class AuthService:
             return None
 
     def verify_token(self, token: str):
-        """Verify a JWT token"""
+        """Verify a JWT token, returning its user id or None if it isn't valid"""
+        # Cache entries never outlive the token's own expiry
+        user_id = self.token_cache.get(token)
+        if user_id is not None:
+            return user_id
+
+        # Reject malformed tokens before paying for base64 decoding and HMAC verification
+        if not _TOKEN_RE.match(token):
+            return None
+
         try:
-            payload = jwt.decode(token, self.settings.SECRET_KEY, algorithms=[self.settings.ALGORITHM])
+            payload = jwt.decode(
+                token,
+                _jwt_key(self.settings.SECRET_KEY, self.settings.ALGORITHM),
+                algorithms=[self.settings.ALGORITHM],
+                options={"verify_aud": False}
+            )
             user_id: str = payload.get("sub")
             if user_id is None:
                 return None
+            self.token_cache.set(token, user_id, payload.get("exp"))
             return user_id
         except jwt.JWTError:
             return None
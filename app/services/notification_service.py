@@ -1,19 +1,21 @@
 # app/services/notification_service.py
 import firebase_admin
 from firebase_admin import messaging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 import logging
-from config import Settings
+from config import get_settings
+from firebase_client import parse_timestamp
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
     """Service for handling push notifications"""
     
-    def __init__(self):
-        self.settings = Settings()
+    def __init__(self, firebase_client):
+        self.settings = get_settings()
         self.enabled = self.settings.ENABLE_NOTIFICATIONS
+        self.firebase_client = firebase_client
     
     def schedule_medication_reminder(self, user_id, medication_id, medication_name, next_dose):
         """Schedule a medication reminder notification"""
@@ -23,27 +25,20 @@ class NotificationService:
         
         try:
             # Get the user's FCM token
-            from app.firebase_client import FirebaseClient
-            firebase_client = FirebaseClient()
-            
-            user_data = firebase_client.get_user(user_id)
+            user_data = self.firebase_client.get_user(user_id)
             if not user_data or 'fcm_token' not in user_data:
-                logger.warning(f"User {user_id} has no FCM token. Cannot schedule medication reminder.")
+                logger.warning("User %s has no FCM token. Cannot schedule medication reminder.", user_id)
                 return
             
             fcm_token = user_data['fcm_token']
             
             # Calculate when to send the notification
-            now = datetime.now()
-            if isinstance(next_dose, str):
-                next_dose = datetime.fromisoformat(next_dose.replace('Z', '+00:00'))
-            
-            # Send a notification 15 minutes before the dose is due
-            notification_time = next_dose - timedelta(minutes=15)
+            now = datetime.now(timezone.utc)
+            notification_time = self._notification_time(next_dose)
             
             # If the notification time is in the past, don't send it
             if notification_time < now:
-                logger.info(f"Notification time for medication {medication_id} is in the past. Skipping.")
+                logger.info("Notification time for medication %s is in the past. Skipping.", medication_id)
                 return
             
             # Create the message
@@ -78,18 +73,12 @@ class NotificationService:
             )
             
             # Store the scheduled notification in Firebase
-            notification_data = {
-                'user_id': user_id,
-                'type': 'medication_reminder',
-                'medication_id': medication_id,
-                'scheduled_time': notification_time,
-                'status': 'scheduled',
-                'created_at': datetime.now()
-            }
-            
-            firebase_client.db.collection('notifications').document().set(notification_data)
-            
-            logger.info(f"Scheduled medication reminder for {medication_name}, user {user_id} at {notification_time}")
+            notification_data = self._notification_data(user_id, medication_id, notification_time, now)
+            
+            doc_ref = self.firebase_client.db.collection('notifications').document()
+            doc_ref.set(notification_data)
+            
+            logger.info("Scheduled medication reminder for %s, user %s at %s", medication_name, user_id, notification_time)
             return True
         # Note: In a real application, you would use a task scheduler like Celery
             # to schedule the notification to be sent at the specified time.
@@ -98,9 +87,73 @@ class NotificationService:
             # notifications and send them when their scheduled time arrives.
             
         except Exception as e:
-            logger.error(f"Error scheduling medication reminder: {str(e)}")
+            logger.error("Error scheduling medication reminder: %s", e)
             return False
     
+    def schedule_medication_reminders_bulk(self, user_id, entries):
+        """Schedule reminders for several doses at once, e.g. after a bulk import or a reschedule.
+
+        Each entry is a dict with ``medication_id``, ``medication_name`` and ``next_dose``.
+        All reminders are written in batched commits instead of one round-trip per dose.
+        """
+        if not self.enabled:
+            logger.info("Notifications are disabled. Skipping medication reminder scheduling.")
+            return
+        
+        try:
+            # The FCM token is checked once for the whole set, not once per dose
+            user_data = self.firebase_client.get_user(user_id)
+            if not user_data or 'fcm_token' not in user_data:
+                logger.warning("User %s has no FCM token. Cannot schedule medication reminders.", user_id)
+                return
+            
+            now = datetime.now(timezone.utc)
+            notifications = []
+            for entry in entries:
+                notification_time = self._notification_time(entry['next_dose'])
+                if notification_time < now:
+                    logger.info("Notification time for medication %s is in the past. Skipping.", entry['medication_id'])
+                    continue
+                notifications.append(self._notification_data(user_id, entry['medication_id'], notification_time, now))
+            
+            # Firestore allows at most 500 writes per batch
+            notifications_ref = self.firebase_client.db.collection('notifications')
+            for i in range(0, len(notifications), 500):
+                batch = self.firebase_client.db.batch()
+                for notification_data in notifications[i:i + 500]:
+                    doc_ref = notifications_ref.document()
+                    batch.set(doc_ref, notification_data)
+                batch.commit()
+            
+            logger.info("Scheduled %d medication reminders for user %s", len(notifications), user_id)
+            return True
+            
+        except Exception as e:
+            logger.error("Error scheduling medication reminders: %s", e)
+            return False
+    
+    @staticmethod
+    def _notification_time(next_dose):
+        """Reminders go out 15 minutes before the dose is due"""
+        if isinstance(next_dose, str):
+            next_dose = parse_timestamp(next_dose)
+        # Naive times are stored as UTC; comparing them with an aware now would raise
+        if next_dose.tzinfo is None:
+            next_dose = next_dose.replace(tzinfo=timezone.utc)
+        return next_dose - timedelta(minutes=15)
+    
+    @staticmethod
+    def _notification_data(user_id, medication_id, notification_time, now):
+        """Build the stored document for a scheduled medication reminder"""
+        return {
+            'user_id': user_id,
+            'type': 'medication_reminder',
+            'medication_id': medication_id,
+            'scheduled_time': notification_time,
+            'status': 'scheduled',
+            'created_at': now
+        }
+    
     def cancel_medication_reminder(self, user_id, medication_id):
         """Cancel scheduled medication reminders for a specific medication"""
         if not self.enabled:
@@ -108,27 +161,29 @@ class NotificationService:
             return
         
         try:
-            from app.firebase_client import FirebaseClient
-            firebase_client = FirebaseClient()
+            notifications_ref = self.firebase_client.db.collection('notifications')
             
             # Find all scheduled notifications for this medication
-            notifications_ref = firebase_client.db.collection('notifications')
             query = notifications_ref.where('user_id', '==', user_id).where('medication_id', '==', medication_id).where('status', '==', 'scheduled')
             
-            scheduled_notifications = query.get()
+            # Only the document references are needed, not the notification bodies
+            scheduled_notifications = [notification.reference for notification in query.select([]).get()]
             
-            for notification in scheduled_notifications:
-                # Mark the notification as cancelled
-                notification.reference.update({'status': 'cancelled'})
+            # Mark the notifications as cancelled, committing up to 500 updates at a time
+            for i in range(0, len(scheduled_notifications), 500):
+                batch = self.firebase_client.db.batch()
+                for notification_ref in scheduled_notifications[i:i + 500]:
+                    batch.update(notification_ref, {'status': 'cancelled'})
+                batch.commit()
             
-            logger.info(f"Cancelled {len(scheduled_notifications)} reminders for medication {medication_id}, user {user_id}")
+            logger.info("Cancelled %d reminders for medication %s, user %s", len(scheduled_notifications), medication_id, user_id)
             return True
             
         except Exception as e:
-            logger.error(f"Error cancelling medication reminders: {str(e)}")
+            logger.error("Error cancelling medication reminders: %s", e)
             return False
     
-    def send_appointment_reminder(self, user_id, appointment_id, appointment_data):
+    async def send_appointment_reminder(self, user_id, appointment_id, appointment_data):
         """Send appointment reminder notification"""
         if not self.enabled:
             logger.info("Notifications are disabled. Skipping appointment reminder.")
@@ -136,34 +191,27 @@ class NotificationService:
         
         try:
             # Get the user's FCM token
-            from app.firebase_client import FirebaseClient
-            firebase_client = FirebaseClient()
-            
-            user_data = firebase_client.get_user(user_id)
+            user_data = await self.firebase_client.aget_user(user_id)
             if not user_data or 'fcm_token' not in user_data:
-                logger.warning(f"User {user_id} has no FCM token. Cannot send appointment reminder.")
+                logger.warning("User %s has no FCM token. Cannot send appointment reminder.", user_id)
                 return
             
             fcm_token = user_data['fcm_token']
             
-            # Create the message
-            message = messaging.Message(
-                notification=messaging.Notification(
-                    title="Appointment Reminder",
-                    body=f"You have an appointment with {appointment_data.get('doctor_name', 'your doctor')} at {appointment_data.get('time')}"
-                ),
-                data={
+            # Send the message over the shared HTTP client
+            response = await self.firebase_client.send_fcm(fcm_token, {
+                "notification": {
+                    "title": "Appointment Reminder",
+                    "body": f"You have an appointment with {appointment_data.get('doctor_name', 'your doctor')} at {appointment_data.get('time')}"
+                },
+                "data": {
                     "type": "appointment_reminder",
                     "appointment_id": appointment_id
-                },
-                token=fcm_token
-            )
-            
-            # Send the message
-            response = messaging.send(message)
-            logger.info(f"Successfully sent appointment reminder: {response}")
+                }
+            })
+            logger.info("Successfully sent appointment reminder: %s", response)
             return True
             
         except Exception as e:
-            logger.error(f"Error sending appointment reminder: {str(e)}")
-            return False
\ No newline at end of file
+            logger.error("Error sending appointment reminder: %s", e)
+            return False
@@ -0,0 +1,75 @@
+# app/user_cache.py
+import threading
+from datetime import datetime
+
+import orjson
+from cachetools import TTLCache
+
+def _encode_default(value):
+    # Firestore returns a datetime subclass that orjson won't encode natively
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError
+
+class UserCache:
+    """
+    Per-user cache keyed by user id, in Redis when a URL is configured so every worker shares it,
+    otherwise in a thread-safe in-process TTL cache. The prefix keeps several caches apart in one Redis
+    """
+
+    def __init__(self, redis_url=None, maxsize=10000, ttl=300, prefix="user"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = None
+        self._aredis = None
+        if redis_url:
+            # Only imported when Redis is configured
+            import redis
+            import redis.asyncio
+
+            self._redis = redis.Redis.from_url(redis_url)
+            self._aredis = redis.asyncio.Redis.from_url(redis_url)
+        else:
+            self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+            self._lock = threading.Lock()
+
+    def _key(self, user_id):
+        return f"{self.prefix}:{user_id}"
+
+    def get(self, user_id):
+        """Return the cached profile for a user, or None on a miss"""
+        if self._redis is None:
+            with self._lock:
+                return self._cache.get(user_id)
+        data = self._redis.get(self._key(user_id))
+        return orjson.loads(data) if data is not None else None
+
+    async def aget(self, user_id):
+        """Return the cached profile for a user, or None on a miss, without blocking the event loop"""
+        if self._aredis is None:
+            return self.get(user_id)
+        data = await self._aredis.get(self._key(user_id))
+        return orjson.loads(data) if data is not None else None
+
+    def set(self, user_id, user):
+        """Cache a user's profile"""
+        if self._redis is None:
+            with self._lock:
+                self._cache[user_id] = user
+            return
+        self._redis.setex(self._key(user_id), self.ttl, orjson.dumps(user, default=_encode_default))
+
+    async def aset(self, user_id, user):
+        """Cache a user's profile without blocking the event loop"""
+        if self._aredis is None:
+            self.set(user_id, user)
+            return
+        await self._aredis.setex(self._key(user_id), self.ttl, orjson.dumps(user, default=_encode_default))
+
+    def invalidate(self, user_id):
+        """Drop a user's cached profile"""
+        if self._redis is None:
+            with self._lock:
+                self._cache.pop(user_id, None)
+            return
+        self._redis.delete(self._key(user_id))
@@ -0,0 +1,42 @@
+# pyright: reportMissingImports=false
+# Offline tool: python utils/convert_models_tflite.py, run from app/ after utils/train_bp_model_tf.py has written
+# models/bp_model_tf.keras and models/bp_scaler.npz. Needs the packages in requirements-ml.txt.
+# The diabetes model is exported to int8 TFLite by its own training script, since it normalizes inputs itself
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+# Feature columns in model input order
+BP_FEATURES = ["male", "age", "sysBP", "diaBP", "BMI", "heartRate"]
+
+def convert_to_tflite(model_path, csv_path, feature_columns, output_path, scaler_path=None, num_samples=100):
+    model = tf.keras.models.load_model(model_path)
+    features = pd.read_csv(csv_path, usecols=feature_columns)[feature_columns].dropna().to_numpy(dtype=np.float32)
+
+    # The model was trained on standardized features, so calibrate on them too; whatever serves the model
+    # must apply the same scaling before inference
+    if scaler_path:
+        with np.load(scaler_path) as stats:
+            features = ((features - stats["mean"]) / stats["scale"]).astype(np.float32)
+
+    # Calibrate the int8 activation ranges on a sample of real inputs
+    def representative_dataset():
+        for row in features[:num_samples]:
+            yield [row.reshape(1, -1)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"✅ Quantized model saved to {output_path}")
+
+if __name__ == "__main__":
+    convert_to_tflite(
+        "models/bp_model_tf.keras",
+        "data/Hypertension-risk-model-main.csv",
+        BP_FEATURES,
+        "models/bp_model_int8.tflite",
+        scaler_path="models/bp_scaler.npz",
+    )
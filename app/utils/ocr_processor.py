@@ -5,20 +5,76 @@ import pytesseract
 from PIL import Image
 import io
 import re
+import heapq
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extraction patterns, compiled once instead of on every OCR request
+_BP_SLASH = re.compile(r'(\d{2,3})\s*/\s*(\d{2,3})')
+_BP_SYS = re.compile(r'(?:SYS|SYSTOLIC)[:\s]+(\d{2,3})', re.IGNORECASE)
+_BP_DIA = re.compile(r'(?:DIA|DIASTOLIC)[:\s]+(\d{2,3})', re.IGNORECASE)
+_BP_PULSE = re.compile(r'(?:PUL|PULSE)[:\s]+(\d{2,3})', re.IGNORECASE)
+_BP_NUMBER = re.compile(r'\b(\d{2,3})\b')
+
+# One alternation so a single scan finds the first value with a unit, the first labeled value and the first bare number
+_BS_VALUE = re.compile(
+    r'(?P<unit_value>\d+\.?\d*)\s*(?:mg/dL|mmol/L|mg|mmol)'  # Value with unit
+    r'|(?:glucose|sugar|reading|glucose reading)[:\s]+(?P<label_value>\d+\.?\d*)'  # Labeled value
+    r'|\b(?P<number>\d+\.?\d*)\b',  # Any number
+    re.IGNORECASE
+)
+
+# Phone photos are far larger than OCR needs; decode them scaled down (JPEG scales during the IDCT)
+# as long as the long side stays at least this many pixels
+_OCR_MIN_LONG_SIDE = 1600
+_REDUCED_GRAYSCALE = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+def _decode_flag(image_data: bytes) -> int:
+    """Pick the smallest grayscale decode scale that keeps enough resolution for OCR"""
+    try:
+        # Only the header is read here, not the pixel data
+        long_side = max(Image.open(io.BytesIO(image_data)).size)
+    except Exception:
+        return cv2.IMREAD_GRAYSCALE
+    for factor, flag in _REDUCED_GRAYSCALE:
+        if long_side // factor >= _OCR_MIN_LONG_SIDE:
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
 class OCRProcessor:
     """Processes images to extract health measurements using OCR"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 2):
         pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        print('Tesseract path set.')
-        pass
+        logger.debug("Tesseract path set.")
+
+        # Tesseract runs as a subprocess and OpenCV releases the GIL, so threads overlap OCR work
+        # without the per-worker process fan-out a process pool would add under Gunicorn
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr")
+        self._local = threading.local()
+    
+    async def process_image_async(self, image_data: bytes, measurement_type: str) -> Dict[str, Any]:
+        """
+        Process image data on the OCR thread pool, without blocking the event loop
+        
+        Args:
+            image_data: Raw image bytes
+            measurement_type: Type of measurement ("blood_pressure" or "blood_sugar")
+            
+        Returns:
+            Dictionary with extracted values
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.process_image, image_data, measurement_type)
     
     def process_image(self, image_data: bytes, measurement_type: str) -> Dict[str, Any]:
         """
@@ -32,16 +88,18 @@ class OCRProcessor:
             Dictionary with extracted values
         """
         try:
-            # Convert bytes to opencv image
+            # Convert bytes to a grayscale opencv image, reduced in size while decoding
             nparr = np.frombuffer(image_data, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            img = cv2.imdecode(nparr, _decode_flag(image_data))
+            if img is None:
+                raise ValueError("Could not decode image")
             
             # Preprocess image
             preprocessed_img = self._preprocess_image(img)
             
             # Extract text using OCR
             extracted_text = pytesseract.image_to_string(preprocessed_img)
-            logger.info(f"OCR extracted text: {extracted_text}")
+            logger.debug("OCR extracted text: %s", extracted_text)
             
             # Process based on measurement type
             if measurement_type == "blood_pressure":
@@ -52,7 +110,7 @@ class OCRProcessor:
                 raise ValueError(f"Unsupported measurement type: {measurement_type}")
                 
         except Exception as e:
-            logger.error(f"OCR processing error: {str(e)}")
+            logger.error("OCR processing error: %s", e)
             raise
     
     def _preprocess_image(self, img: np.ndarray) -> np.ndarray:
@@ -60,28 +118,21 @@ class OCRProcessor:
         Preprocess image to improve OCR accuracy
         
         Args:
-            img: OpenCV image
+            img: Grayscale OpenCV image
             
         Returns:
             Preprocessed image
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # Contrast enhancement; CLAHE objects hold working buffers, so each OCR thread builds its own once
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        enhanced = clahe.apply(img)
         
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+        # Apply adaptive thresholding to the enhanced image
+        return cv2.adaptiveThreshold(
+            enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
         )
-        
-        # Noise removal using morphological operations
-        kernel = np.ones((1, 1), np.uint8)
-        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-        
-        # Additional contrast enhancement
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
-        
-        return enhanced
     
     def _extract_blood_pressure(self, text: str) -> Dict[str, Any]:
         """
@@ -93,7 +144,7 @@ class OCRProcessor:
         Returns:
             Dictionary with systolic, diastolic, and optionally pulse values
         """
-        logger.info(f"Extracting blood pressure from text: {text}")
+        logger.debug("Extracting blood pressure from text: %s", text)
         
         # Common formats: "120/80", "SYS 120 DIA 80 PULSE 72"
         systolic = None
@@ -101,36 +152,36 @@ class OCRProcessor:
         pulse = None
         
         # Try to find systolic/diastolic in format like "120/80"
-        bp_match = re.search(r'(\d{2,3})\s*/\s*(\d{2,3})', text)
+        bp_match = _BP_SLASH.search(text)
         if bp_match:
             systolic = int(bp_match.group(1))
             diastolic = int(bp_match.group(2))
+        else:
+            # Look for labeled values, only needed when there is no slash reading
+            sys_match = _BP_SYS.search(text)
+            dia_match = _BP_DIA.search(text)
+            
+            if sys_match:
+                systolic = int(sys_match.group(1))
+            if dia_match:
+                diastolic = int(dia_match.group(1))
         
-        # Look for labeled values
-        sys_match = re.search(r'(?:SYS|SYSTOLIC)[:\s]+(\d{2,3})', text, re.IGNORECASE)
-        dia_match = re.search(r'(?:DIA|DIASTOLIC)[:\s]+(\d{2,3})', text, re.IGNORECASE)
-        pulse_match = re.search(r'(?:PUL|PULSE)[:\s]+(\d{2,3})', text, re.IGNORECASE)
-        
-        if sys_match:
-            systolic = int(sys_match.group(1))
-        if dia_match:
-            diastolic = int(dia_match.group(1))
+        pulse_match = _BP_PULSE.search(text)
         if pulse_match:
             pulse = int(pulse_match.group(1))
         
         # Last resort: look for any two numbers that could be systolic/diastolic
         if systolic is None or diastolic is None:
-            numbers = re.findall(r'\b(\d{2,3})\b', text)
+            numbers = _BP_NUMBER.findall(text)
             if len(numbers) >= 2:
-                # Usually the first larger number is systolic, the second smaller number is diastolic
-                potential_values = [int(num) for num in numbers]
-                potential_values.sort(reverse=True)  # Sort in descending order
+                # Usually the larger number is systolic and the next largest is diastolic
+                largest, second = heapq.nlargest(2, map(int, numbers))
                 
-                if systolic is None and len(potential_values) > 0:
-                    systolic = potential_values[0]
+                if systolic is None:
+                    systolic = largest
                 
-                if diastolic is None and len(potential_values) > 1:
-                    diastolic = potential_values[1]
+                if diastolic is None:
+                    diastolic = second
         
         # Validate and return results
         if systolic is None or diastolic is None:
@@ -165,42 +216,29 @@ class OCRProcessor:
         Returns:
             Dictionary with blood sugar value and unit
         """
-        logger.info(f"Extracting blood sugar from text: {text}")
+        logger.debug("Extracting blood sugar from text: %s", text)
         
-        # Look for patterns like "Blood Glucose: 120 mg/dL"
+        # Look for patterns like "Blood Glucose: 120 mg/dL"; a value with a unit wins over a labeled value,
+        # which wins over any number in a typical blood sugar range (40-600 mg/dL or 2.2-33.3 mmol/L)
         value_match = None
-        
-        # General numeric pattern with optional decimal
-        numeric_patterns = [
-            r'(\d+\.?\d*)\s*(mg/dL|mmol/L|mg|mmol)',  # Value with unit
-            r'(?:glucose|sugar|reading|glucose reading)[:\s]+(\d+\.?\d*)',  # Labeled value
-            r'(\d+\.?\d*)\s*(?:mg|mmol)'  # Value with partial unit
-        ]
-        
-        for pattern in numeric_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value_match = match
+        label_value = None
+        number_value = None
+        for match in _BS_VALUE.finditer(text):
+            if match['unit_value']:
+                value_match = match['unit_value']
                 break
-        
-        # Last resort: look for any number that could be blood sugar
-        if not value_match:
-            # Look for numbers in a typical blood sugar range (40-600 mg/dL or 2.2-33.3 mmol/L)
-            numbers = re.findall(r'\b(\d+\.?\d*)\b', text)
-            if numbers:
-                for num in numbers:
-                    value = float(num)
-                    # Determine if it's in a reasonable blood sugar range
-                    if 40 <= value <= 600:  # mg/dL range
-                        value_match = re.search(num, text)
-                        break
-                    elif 2.0 <= value <= 33.3:  # mmol/L range
-                        value_match = re.search(num, text)
-                        break
+            if match['label_value']:
+                label_value = label_value or match['label_value']
+            elif match['number'] and number_value is None:
+                number = float(match['number'])
+                if 40 <= number <= 600 or 2.0 <= number <= 33.3:  # mg/dL or mmol/L range
+                    number_value = match['number']
+        else:
+            value_match = label_value or number_value
         
         if value_match:
             try:
-                value = float(value_match.group(1))
+                value = float(value_match)
                 
                 # Try to determine unit
                 unit = "mg/dL"  # Default
@@ -218,7 +256,7 @@ class OCRProcessor:
                     "unit": unit
                 }
             except ValueError as e:
-                logger.error(f"Error parsing blood sugar value: {str(e)}")
+                logger.error("Error parsing blood sugar value: %s", e)
                 raise ValueError("Could not extract valid blood sugar value from image")
         else:
             raise ValueError("Could not extract blood sugar value from image")
\ No newline at end of file